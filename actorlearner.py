@@ -0,0 +1,125 @@
+import multiprocessing
+import Queue
+import time
+import numpy as np
+
+#Actor-learner training of a DeepAgent.
+#The actors are forked processes, each one with a copy of the agent and its own batch of
+#environments (as CartAndBallBatch): they choose the actions of all the environments with one
+#batched forward of Q (one forward for each environment if Q does not accept batches) and the
+#eps-greedy policy, and they send the transitions in chunks to the learner.
+#The learner (the calling process) puts the transitions in the replay memory of the agent, runs
+#the minibatch updates without waiting for the actors and every sync_every updates publishes
+#the weights of Q in a shared memory snapshot that the actors reload.
+#An environment has observation() and step(dt, commands) -> (observation, reward, done)
+#and restarts the finished episodes by itself.
+
+def eps_greedy_actions(Q_out, epsilon):
+    actions = np.argmax(Q_out, 1)
+    explore = np.random.rand(actions.size) < epsilon
+    actions[explore] = np.random.randint(0, Q_out.shape[1], np.sum(explore))
+    return actions
+
+class ActorLearner():
+    #make_env: function that creates the environments of an actor
+    #commands: table from the actions of the agent to the commands of the environment
+    def __init__(self, agent, make_env, commands, actors = 2, time_step = 0.01, chunk_size = 256, sync_every = 10, seed = 0):
+        self.agent = agent
+        self.make_env = make_env
+        self.commands = np.asarray(commands)
+        self.actors = actors
+        self.time_step = time_step
+        self.chunk_size = chunk_size
+        self.sync_every = sync_every
+        self.seed = seed
+        self.weights = [weight for name, weight in agent.Q.shared_weights()]
+        self.snapshot = None
+        self.version = None
+
+    def publish(self):
+        with self.snapshot.get_lock():
+            np.frombuffer(self.snapshot.get_obj())[...] = np.hstack([weight.W.ravel() for weight in self.weights])
+            self.version.value += 1
+
+    def load_snapshot(self):
+        with self.snapshot.get_lock():
+            flat = np.frombuffer(self.snapshot.get_obj()).copy()
+            version = self.version.value
+        a = 0
+        for weight in self.weights:
+            weight.W[...] = flat[a:a+weight.W.size].reshape(weight.W.shape)
+            weight.version += 1
+            a += weight.W.size
+        return version
+
+    #Q values of all the observations, one row for each environment
+    def forward_all(self, observations):
+        if self.agent.Q.accepts_batch():
+            return self.agent.Q.forward(observations)
+        return np.array([self.agent.Q.forward(observation) for observation in observations])
+
+    def act(self, index, queue, stop):
+        np.random.seed(self.seed+index)
+        env = self.make_env()
+        version = -1
+        chunk = []
+        observation = env.observation()
+        while not stop.is_set():
+            if self.version.value != version:
+                version = self.load_snapshot()
+            actions = eps_greedy_actions(self.forward_all(observation), self.agent.epsilon)
+            next_observation, rewards, dones = env.step(self.time_step, self.commands[actions])
+            chunk.append((observation, actions, rewards, next_observation, dones))
+            if len(chunk)*len(actions) >= self.chunk_size:
+                queue.put(tuple(np.concatenate(column) for column in zip(*chunk)))
+                chunk = []
+            observation = env.observation()
+
+    def receive(self, queue, block = False):
+        transitions = 0
+        while True:
+            try:
+                chunk = queue.get(block, 1.0) if block else queue.get_nowait()
+            except Queue.Empty:
+                return transitions
+            self.agent.D.extend(*chunk)
+            transitions += len(chunk[1])
+            block = False
+
+    #learner loop, it stops after steps minibatch updates or after duration seconds
+    #returns the number of transitions and updates and their rates
+    def run(self, steps = None, duration = None):
+        self.snapshot = multiprocessing.Array('d', int(sum([weight.W.size for weight in self.weights])))
+        self.version = multiprocessing.Value('i', 0)
+        self.publish()
+        queue = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        processes = [multiprocessing.Process(target=self.act, args=(index, queue, stop)) for index in range(self.actors)]
+        for process in processes:
+            process.daemon = True
+            process.start()
+        start = time.time()
+        transitions = 0
+        updates = 0
+        try:
+            while (steps is None or updates < steps) and (duration is None or time.time()-start < duration):
+                transitions += self.receive(queue, len(self.agent.D) < self.agent.minibatch_size)
+                if len(self.agent.D) >= self.agent.minibatch_size:
+                    self.agent.learn()
+                    updates += 1
+                    if updates % self.sync_every == 0:
+                        self.publish()
+        finally:
+            elapsed = time.time()-start
+            stop.set()
+            #the actors end only when the queue is empty
+            while any([process.is_alive() for process in processes]):
+                transitions += self.receive(queue)
+                for process in processes:
+                    process.join(0.01)
+        return {
+            'transitions': transitions,
+            'updates': updates,
+            'transitions_per_second': transitions/elapsed,
+            'updates_per_second': updates/elapsed,
+        }
@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import Queue
+import sys
+import time
+import numpy as np
+
+#ShowTraining in another process: show sends only the values of the last epoch in a queue and returns
+#at once, the plotting process redraws at most every min_interval seconds.
+#The norms of the weights are computed at most every min_interval seconds (and at the last epoch).
+#matplotlib is imported only in the plotting process, after the choice of the backend: without a display
+#or with filename the plots are drawn with the Agg backend and saved in filename.
+#show has the same arguments of ShowTraining.show, so it can be the show_function of Trainer.
+class AsyncShowTraining():
+    def __init__(self, epochs_num = None, weights_list = None, min_interval = 0.5, filename = None):
+        self.epochs_num = epochs_num
+        self.weights_list = weights_list if weights_list is not None else {}
+        self.names = sorted(self.weights_list)
+        self.min_interval = min_interval
+        self.last_norms = None
+        headless = filename is not None or not os.environ.get('DISPLAY')
+        self.queue = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_show_training,
+            args=(self.queue, epochs_num, self.names, min_interval, headless, filename or 'training.png')
+        )
+        self.process.daemon = True
+        self.process.start()
+
+    #norms of the weights, None if the last ones are recent
+    def norms(self, epoch):
+        now = time.time()
+        last = self.epochs_num is not None and epoch == self.epochs_num-1
+        if not self.names or (self.last_norms is not None and now-self.last_norms < self.min_interval and not last):
+            return None
+        self.last_norms = now
+        return [np.linalg.norm(self.weights_list[name].get()) for name in self.names]
+
+    def show(self, epoch, J_train_list, dJdy_list = None, J_test_list = None):
+        self.queue.put((
+            epoch,
+            J_train_list[epoch],
+            dJdy_list[epoch] if dJdy_list is not None else None,
+            J_test_list[epoch] if J_test_list is not None else None,
+            self.norms(epoch)
+        ))
+
+    #waits the last redraw
+    def close(self):
+        self.queue.put(None)
+        self.process.join()
+
+#history of the points received from the queue until None, draw(history, limits) is called
+#at most every min_interval seconds when there are new points and at the end
+def consume(queue, min_interval, draw):
+    history = {'epoch': [], 'train': [], 'dJdy': [], 'test': [], 'weights_epoch': [], 'weights': []}
+    #running limits of the plots (errors, gradients, weights), the history is never scanned again
+    limits = [[np.inf, -np.inf] for i in range(3)]
+    last_draw = 0.0
+    changed = False
+    running = True
+    while running or changed:
+        try:
+            point = queue.get(True, min_interval) if running else None
+        except Queue.Empty:
+            point = False
+        if point is None:
+            running = False
+        elif point is not False:
+            epoch, J_train, J_dJdy, J_test, norms = point
+            history['epoch'].append(epoch)
+            for key, value in [('train', J_train), ('dJdy', J_dJdy), ('test', J_test)]:
+                history[key].append(value)
+            if norms is not None:
+                history['weights_epoch'].append(epoch)
+                history['weights'].append(norms)
+            values = [[J_train]+([J_test] if J_test is not None else []), [J_dJdy] if J_dJdy is not None else [], norms or []]
+            for limit, value in zip(limits, values):
+                if len(value) > 0:
+                    limit[0] = min(limit[0], np.min(value))
+                    limit[1] = max(limit[1], np.max(value))
+            changed = True
+        if changed and (not running or time.time()-last_draw >= min_interval):
+            draw(history, limits)
+            last_draw = time.time()
+            changed = False
+    return history
+
+def _show_training(queue, epochs_num, names, min_interval, headless, filename):
+    import matplotlib
+    if headless:
+        if 'matplotlib.pyplot' in sys.modules:
+            #pyplot already imported by the parent process
+            sys.modules['matplotlib.pyplot'].switch_backend('Agg')
+        else:
+            matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    if not headless:
+        plt.ion()
+    fig, axes = plt.subplots(3 if names else 2, 1)
+    axes[0].set_title('Errors History (J)')
+    train, = axes[0].plot([], [], color='green', marker='^', label='Training')
+    test, = axes[0].plot([], [], color='blue', marker='s', label='Test')
+    axes[0].set_ylabel(r'$||J||_2/N$')
+    axes[0].legend()
+    axes[1].set_title('Loss Gradient History (dJ/dy)')
+    dJdy, = axes[1].plot([], [], color='red', marker='o')
+    axes[1].set_ylabel(r'$||\delta J/\delta y||_2/N$')
+    weightslines = []
+    if names:
+        axes[2].set_title('Weights Norm2')
+        weightslines = [axes[2].plot([], [], marker='o', label=name)[0] for name in names]
+        axes[2].set_ylabel(r'$||W_i||_2$')
+        axes[2].legend()
+    for ax in axes:
+        ax.set_xlabel('Epochs')
+        if epochs_num is not None:
+            ax.set_xlim([0,epochs_num])
+    fig.tight_layout()
+
+    def draw(history, limits):
+        train.set_data(history['epoch'], history['train'])
+        if history['test'][-1] is not None:
+            test.set_data(history['epoch'], history['test'])
+        if history['dJdy'][-1] is not None:
+            dJdy.set_data(history['epoch'], history['dJdy'])
+        for i, line in enumerate(weightslines):
+            line.set_data(history['weights_epoch'], [norms[i] for norms in history['weights']])
+        for ax, limit in zip(axes, limits):
+            if epochs_num is None:
+                ax.set_xlim([0, max(history['epoch'][-1], 1)])
+            if np.isfinite(limit[0]) and limit[1] > limit[0]:
+                ax.set_ylim([limit[0]-abs(limit[0])*0.1, limit[1]+abs(limit[1])*0.1])
+        if headless:
+            fig.savefig(filename)
+        else:
+            fig.canvas.draw()
+            plt.pause(0.001)
+
+    consume(queue, min_interval, draw)
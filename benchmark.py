@@ -0,0 +1,201 @@
+import os, sys, json, subprocess
+import numpy as np
+from timeit import default_timer as timer
+
+import layers
+import losses
+import groupnetworks
+import optimizers
+from genericlayer import GenericLayer
+
+#Microbenchmarks of the primitives in layers, losses, groupnetworks and optimizers.
+#Every case measures the time of a batch (batch_size forward, batch_size backward
+#and one update of the optimizer) for several sizes and batch sizes.
+#The results are stored per commit in results_dir/<commit>.json and can be compared
+#with: python benchmark.py compare <commit_base> <commit_head>
+
+SIZES = [10, 100, 1000]
+BATCH_SIZES = [1, 10, 100]
+
+def make_layer_cases(size):
+    return {
+        'LinearLayer': lambda: (layers.LinearLayer(size, size), np.random.rand(size)),
+        'MWeightLayer': lambda: (layers.MWeightLayer(size, size), np.random.rand(size)),
+        'VWeightLayer': lambda: (layers.VWeightLayer(size), np.random.rand(size)),
+        'SoftMaxLayer': lambda: (layers.SoftMaxLayer(), np.random.rand(size)),
+        'HeavisideLayer': lambda: (layers.HeavisideLayer(), np.random.rand(size)),
+        'SignLayer': lambda: (layers.SignLayer(), np.random.rand(size)),
+        'TanhLayer': lambda: (layers.TanhLayer(), np.random.rand(size)),
+        'SigmoidLayer': lambda: (layers.SigmoidLayer(), np.random.rand(size)),
+        'ReluLayer': lambda: (layers.ReluLayer(), np.random.rand(size)),
+        'NegativeLayer': lambda: (layers.NegativeLayer(), np.random.rand(size)),
+        'NormalizationLayer': lambda: (layers.NormalizationLayer(0.0, 1.0, -1.0, 1.0), np.random.rand(size)),
+        'RandomGaussianLayer': lambda: (layers.RandomGaussianLayer(), np.random.rand(size)),
+        'SumLayer': lambda: (layers.SumLayer(), [np.random.rand(size) for i in range(3)]),
+        'MulLayer': lambda: (layers.MulLayer(), [np.random.rand(size) for i in range(3)]),
+        'ConcatLayer': lambda: (layers.ConcatLayer(), [np.random.rand(size) for i in range(3)]),
+        'SumGroup': lambda: (groupnetworks.SumGroup(layers.LinearLayer(size, size), GenericLayer), [np.random.rand(size) for i in range(2)]),
+        'MulGroup': lambda: (groupnetworks.MulGroup(layers.LinearLayer(size, size), GenericLayer), [np.random.rand(size) for i in range(2)]),
+        'ParallelGroup': lambda: (groupnetworks.ParallelGroup(layers.LinearLayer(size, size), GenericLayer), np.random.rand(size)),
+        'Lock': lambda: (layers.Lock(layers.LinearLayer(size, size)), np.random.rand(size)),
+        'RandomChoice': lambda: (layers.RandomChoice(), np.ones(size)/size),
+        'SelectVariableLayer': lambda: (layers.SelectVariableLayer(['x', 'h'], 'x'), [np.random.rand(size) for i in range(2)]),
+        'VariableDictLayer': lambda: (layers.VariableDictLayer(['x', 'h']), {'x': np.random.rand(size), 'h': np.random.rand(size)}),
+        'ConstantLayer': lambda: (layers.ConstantLayer(np.random.rand(size)), np.random.rand(size)),
+    }
+
+def make_loss_cases():
+    return {
+        'HuberLoss': losses.HuberLoss,
+        'SquaredLoss': losses.SquaredLoss,
+        'NegativeLogLikelihoodLoss': losses.NegativeLogLikelihoodLoss,
+        'CrossEntropyLoss': losses.CrossEntropyLoss,
+    }
+
+def make_optimizer_cases():
+    return {
+        'GradientDescent': lambda: optimizers.GradientDescent(learning_rate=0.01),
+        'GradientDescentMomentum': lambda: optimizers.GradientDescentMomentum(learning_rate=0.01, momentum=0.9),
+        'AdaGrad': lambda: optimizers.AdaGrad(learning_rate=0.01),
+    }
+
+def output_like(y):
+    if type(y) is list:
+        return [np.random.rand(*element.shape) for element in y]
+    return np.random.rand(*np.shape(y))
+
+class Benchmark():
+    def __init__(self, sizes = SIZES, batch_sizes = BATCH_SIZES, repeat = 3):
+        self.sizes = sizes
+        self.batch_sizes = batch_sizes
+        self.repeat = repeat
+
+    def best_of(self, fun):
+        best = None
+        for r in range(self.repeat):
+            start = timer()
+            fun()
+            elapsed = timer() - start
+            best = elapsed if best is None or elapsed < best else best
+        return best
+
+    def bench_layer(self, layer, x, batch_size):
+        optimizer = optimizers.GradientDescent(learning_rate=0.0)
+        y = layer.forward(x, True)
+        dJdy = output_like(y)
+
+        def forward():
+            for i in xrange(batch_size):
+                layer.forward(x, True)
+
+        def backward():
+            for i in xrange(batch_size):
+                layer.backward(dJdy, optimizer)
+
+        return {
+            'forward': self.best_of(forward),
+            'backward': self.best_of(backward),
+            'update': self.best_of(optimizer.update_model),
+        }
+
+    def bench_loss(self, loss, size, batch_size):
+        y = np.random.rand(size)
+        t = np.random.rand(size)
+
+        def forward():
+            for i in xrange(batch_size):
+                loss.loss(y, t)
+
+        def backward():
+            for i in xrange(batch_size):
+                loss.dJdy_gradient(y, t)
+
+        return {
+            'forward': self.best_of(forward),
+            'backward': self.best_of(backward),
+        }
+
+    def bench_optimizer(self, optimizer, size, batch_size):
+        layer = layers.LinearLayer(size, size)
+        x = np.random.rand(size)
+        dJdy = np.random.rand(size)
+
+        def backward():
+            for i in xrange(batch_size):
+                layer.forward(x, True)
+                layer.backward(dJdy, optimizer)
+
+        def update():
+            backward()
+            optimizer.update_model()
+
+        return {
+            'update': max(self.best_of(update) - self.best_of(backward), 0.0),
+        }
+
+    def run(self):
+        results = {}
+        for size in self.sizes:
+            for batch_size in self.batch_sizes:
+                for name, create in make_layer_cases(size).items():
+                    layer, x = create()
+                    results['layers.%s/%d/%d' % (name, size, batch_size)] = self.bench_layer(layer, x, batch_size)
+                for name, loss in make_loss_cases().items():
+                    results['losses.%s/%d/%d' % (name, size, batch_size)] = self.bench_loss(loss(), size, batch_size)
+                for name, create in make_optimizer_cases().items():
+                    results['optimizers.%s/%d/%d' % (name, size, batch_size)] = self.bench_optimizer(create(), size, batch_size)
+        return results
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD']).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def save(results, commit, results_dir = 'bench_results'):
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+    file = os.path.join(results_dir, commit+'.json')
+    with open(file, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    return file
+
+def load(commit, results_dir = 'bench_results'):
+    file = os.path.join(results_dir, commit+'.json')
+    if not os.path.isfile(file):
+        raise Exception('File does not exist!')
+    with open(file, 'r') as f:
+        return json.load(f)
+
+#Times below min_time are dominated by the timer noise: the phases with both the times below min_time
+#(as the update of the layers without weights) are not in the report
+def compare(base, head, threshold = 0.1, min_time = 1e-5):
+    report = []
+    for case in sorted(set(base) & set(head)):
+        for phase in sorted(set(base[case]) & set(head[case])):
+            base_time = base[case][phase]
+            head_time = head[case][phase]
+            if max(base_time, head_time) < min_time:
+                continue
+            ratio = head_time/base_time if base_time > 0 else float('inf')
+            if ratio > 1+threshold:
+                status = 'REGRESSION'
+            elif ratio < 1-threshold:
+                status = 'improvement'
+            else:
+                status = ''
+            report.append((case, phase, base_time, head_time, ratio, status))
+    return report
+
+def format_report(report):
+    lines = ['%-50s %-9s %12s %12s %8s' % ('case', 'phase', 'base(s)', 'head(s)', 'ratio')]
+    for case, phase, base_time, head_time, ratio, status in report:
+        lines.append('%-50s %-9s %12.6f %12.6f %8.3f %s' % (case, phase, base_time, head_time, ratio, status))
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        print format_report(compare(load(sys.argv[2]), load(sys.argv[3])))
+    else:
+        commit = sys.argv[1] if len(sys.argv) > 1 else current_commit()
+        print 'Saved '+save(Benchmark().run(), commit)
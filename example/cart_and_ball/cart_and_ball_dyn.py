@@ -61,3 +61,70 @@ class Cart():
                 self.p[0] = 0
             if self.p[0] >= horizontal_desksize:
                 self.p[0] = horizontal_desksize
+
+#force of the discrete actions of the agents: right, left, none
+commands = np.array([1.0, -1.0, 0.0])
+
+#n worlds with a cart and a ball simulated together, the state of every world is a row
+#of the arrays. The dynamics is the same of Cart and Ball with the cart moving only along x.
+#A world ends when the ball is lost or after max_catches catches and it restarts at once,
+#so step returns the observation of the end of the episode and observation() the new one.
+class CartAndBallBatch():
+    def __init__(self, n, max_catches = 10, reward_catch = 1.0, reward_lose = -1.0):
+        self.n = n
+        self.max_catches = max_catches
+        self.reward_catch = reward_catch
+        self.reward_lose = reward_lose
+        self.ball_p = np.zeros([n, 2])
+        self.ball_v = np.zeros([n, 2])
+        self.cart_p = np.zeros([n, 2])
+        self.cart_v = np.zeros([n, 2])
+        self.cart_w = cart_width
+        self.catch = np.zeros(n, dtype=bool)
+        self.lose = np.zeros(n, dtype=bool)
+        self.catches = np.zeros(n, dtype=int)
+        self.steps = np.zeros(n, dtype=int)
+        self.reset()
+
+    def reset(self, worlds = None):
+        worlds = np.arange(self.n) if worlds is None else np.flatnonzero(worlds)
+        k = worlds.size
+        self.ball_v[worlds] = np.vstack([np.random.rand(k)*max_start_velocity*2-max_start_velocity, np.random.rand(k)]).T
+        self.ball_p[worlds] = np.vstack([np.random.rand(k)*(horizontal_desksize-2)+1, 4.0*np.ones(k)]).T
+        self.cart_v[worlds] = 0.0
+        self.cart_p[worlds] = np.vstack([np.floor(np.random.rand(k)*horizontal_desksize), cart_height*np.ones(k)]).T
+        self.catches[worlds] = 0
+        self.steps[worlds] = 0
+
+    #ball x and cart x of every world
+    def observation(self):
+        return np.vstack([self.ball_p[:,0], self.cart_p[:,0]]).T
+
+    #command_x: force on the carts, one for each world
+    def step(self, dt, command_x):
+        cart_a = (np.asarray(command_x, dtype=float)-self.cart_v[:,0]*viscous_friction)/cart_mass
+        self.cart_v[:,0] += dt*cart_a
+        self.cart_p[:,0] += dt*self.cart_v[:,0]
+        out = (self.cart_p[:,0] <= 0.0) | (self.cart_p[:,0] >= horizontal_desksize)
+        self.cart_v[out,0] = 0.0
+        self.cart_p[:,0] = np.clip(self.cart_p[:,0], 0.0, horizontal_desksize)
+
+        self.ball_v[:,1] += dt*gravity
+        self.ball_p += dt*self.ball_v
+        self.catch = ((self.ball_p[:,0] > self.cart_p[:,0]-self.cart_w/2) &
+            (self.ball_p[:,0] < self.cart_p[:,0]+self.cart_w/2) & (self.ball_p[:,1] < self.cart_p[:,1]))
+        self.ball_v[self.catch,1] = -self.ball_v[self.catch,1]
+        self.ball_v[self.catch,0] += self.cart_v[self.catch,0]*0.1
+        self.ball_p[self.catch,1] = self.cart_p[self.catch,1]+0.1
+        side = (self.ball_p[:,0] < 0) | (self.ball_p[:,0] >= horizontal_desksize)
+        self.ball_v[side,0] = -self.ball_v[side,0]
+        self.lose = self.ball_p[:,1] < 0
+        self.ball_p[:,1] = np.minimum(self.ball_p[:,1], vertical_desksize)
+
+        self.catches += self.catch
+        self.steps += 1
+        reward = self.reward_catch*self.catch+self.reward_lose*self.lose
+        done = self.lose | (self.catches > self.max_catches)
+        observation = self.observation()
+        self.reset(done)
+        return observation, reward, done
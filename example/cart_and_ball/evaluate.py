@@ -0,0 +1,108 @@
+import multiprocessing
+import sys
+import numpy as np
+
+from cart_and_ball_dyn import CartAndBallBatch, commands
+from layers import GenericLayer
+from qlearning import DeepAgent, BatchAgent, GenericAgent, Agent, AseAce
+
+#Headless evaluation of a cart and ball agent: the episodes are run without animation
+#and without reinforcement, split in a process pool. Every episode has its own seed
+#(seed + episode number), so the results do not depend on the number of processes.
+#The agent is evaluated with a policy, a function from the observation (ball x, cart x)
+#to the action index that must not learn (so the episodes are independent): by default
+#the greedy policy of the agent. The action is converted in the force on the cart with
+#the commands table (AseAce has only the actions 0 and 1).
+
+time_step = 0.01
+
+#greedy policy without learning of a DeepAgent, GenericAgent, Agent, BatchAgent or AseAce
+#state_function: from the observation to the state of the agent: the index of the state (or the
+#one-hot state) for Agent and BatchAgent, the input of the network or of the controller for the others
+def greedy_policy(agent, state_function = None):
+    state_function = state_function if state_function is not None else (lambda observation: observation)
+    if isinstance(agent, DeepAgent):
+        return lambda observation: np.argmax(agent.Q.forward(state_function(observation)))
+    if isinstance(agent, GenericAgent):
+        return lambda observation: np.argmax(agent.model.forward(state_function(observation)))
+    if isinstance(agent, Agent):
+        return lambda observation: np.argmax(agent.values(agent.state(state_function(observation))))
+    if isinstance(agent, BatchAgent):
+        return lambda observation: agent.greedy(np.array([state_function(observation)], dtype=int))[0]
+    if isinstance(agent, AseAce):
+        #the action of Ase without the exploration noise
+        return lambda observation: int(np.sign(agent.ase.W.dot(state_function(observation)))/2.0+1.0)
+    raise Exception('Agent without a greedy policy, pass a policy!')
+
+def run_episode(policy, seed, commands = commands, max_steps = 10000, max_catches = 10):
+    np.random.seed(seed)
+    env = CartAndBallBatch(1, max_catches)
+    catches = 0
+    for step in range(max_steps):
+        action = policy(env.observation()[0])
+        observation, reward, done = env.step(time_step, [commands[action]])
+        catches += int(env.catch[0])
+        if done[0]:
+            return catches, bool(env.lose[0]), step+1
+    return catches, False, max_steps
+
+_evaluated = None
+
+def _run_episodes(args):
+    seeds, options = args
+    return [run_episode(_evaluated, seed, **options) for seed in seeds]
+
+#agent: an agent or the file of a saved agent, used only for the default policy
+#policy: function from the observation to the action, greedy_policy(agent, state_function) if None
+def evaluate(agent, episodes, processes = None, seed = 0, policy = None, state_function = None, **options):
+    global _evaluated
+    if isinstance(agent, str):
+        agent = GenericLayer.load(agent)
+    if policy is None:
+        policy = greedy_policy(agent, state_function)
+    seeds = np.arange(seed, seed+episodes)
+    _evaluated = policy
+    try:
+        if processes is None or processes <= 1:
+            results = _run_episodes((seeds, options))
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                shards = [(shard, options) for shard in np.array_split(seeds, processes) if shard.size > 0]
+                results = sum(pool.map(_run_episodes, shards), [])
+            finally:
+                pool.close()
+                pool.join()
+    finally:
+        _evaluated = None
+    return aggregate(results)
+
+def aggregate(results):
+    catches = np.array([result[0] for result in results], dtype=float)
+    lose = np.array([result[1] for result in results], dtype=bool)
+    lengths = np.array([result[2] for result in results], dtype=float)
+    return {
+        'episodes': len(results),
+        'lose_rate': np.mean(lose),
+        'catch_rate': np.sum(catches)/np.sum(lengths*time_step),
+        'mean_catches': np.mean(catches),
+        'mean_length': np.mean(lengths),
+        'std_length': np.std(lengths),
+        'min_length': np.min(lengths),
+        'max_length': np.max(lengths),
+    }
+
+def format_report(report):
+    return '\n'.join([
+        'episodes:       %d' % report['episodes'],
+        'lose rate:      %.3f' % report['lose_rate'],
+        'catches/s:      %.3f' % report['catch_rate'],
+        'catches/ep:     %.3f' % report['mean_catches'],
+        'episode length: %.1f +- %.1f steps (min %d, max %d)' % (report['mean_length'], report['std_length'], report['min_length'], report['max_length']),
+    ])
+
+#python evaluate.py deepagent.net [episodes] [processes]
+if __name__ == '__main__':
+    episodes = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else multiprocessing.cpu_count()
+    print format_report(evaluate(sys.argv[1], episodes, processes))
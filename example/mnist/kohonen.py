@@ -28,15 +28,15 @@ model = Kohonen(
     radius = start_radius
 )
 
-for epoch in range(epochs):
-    print epoch
-    np.random.shuffle(train)
-    for data in train:
-        model.forward(data[0],True)
-
-        model.learning_rate = stop_learning_rate+(start_learning_rate-stop_learning_rate)*(epochs-epoch)/epochs
-        model.radius = stop_radius+(start_radius-stop_radius)*(epochs-epoch)/epochs
-    plotWeights(model,epoch)
+data = np.array([x for (x,t) in train])
+model.train(
+    data,
+    epochs,
+    batch_size = 100,
+    learning_rate = (start_learning_rate, stop_learning_rate),
+    radius = (start_radius, stop_radius)
+)
+plot_weights(model,epochs)
 
 model.save('kohonen.net')
 
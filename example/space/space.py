@@ -22,4 +22,56 @@ class Ball():
             self.lose = 1
 
         if np.sqrt((self.p[0]-win[0])**2+(self.p[1]-win[1])**2) < win[2]:
-            self.win = 1
\ No newline at end of file
+            self.win = 1
+
+#acceleration of the discrete actions of the agents: right, left, up, down
+commands = np.array([[4.0, 0.0], [-4.0, 0.0], [0.0, 4.0], [0.0, -4.0]])
+
+#n balls simulated together, the state of every ball is a row of the arrays.
+#The dynamics is the same of Ball, obstacles and win are circles (x, y, radius).
+#An episode ends with a win, a lose or after time_limit seconds and the ball restarts at once
+#from start (random if None), so step returns the observation of the end of the episode.
+#The time limit is not in Ball: without it a ball that stops in the free space would never restart,
+#it ends the episode with reward_timeout; time_limit = np.inf gives the episodes of Ball.
+class BallBatch():
+    def __init__(self, n, obstacles, win, start = None, time_limit = 5.0, reward_win = 1.0, reward_lose = -1.0, reward_timeout = 0.0):
+        self.n = n
+        self.obstacles = np.array(obstacles, dtype=float).reshape(-1, 3)
+        self.win_area = np.array(win, dtype=float)
+        self.start = start
+        self.time_limit = time_limit
+        self.reward_win = reward_win
+        self.reward_lose = reward_lose
+        self.reward_timeout = reward_timeout
+        self.p = np.zeros([n, 2])
+        self.v = np.zeros([n, 2])
+        self.time = np.zeros(n)
+        self.lose = np.zeros(n, dtype=bool)
+        self.win = np.zeros(n, dtype=bool)
+        self.reset()
+
+    def reset(self, balls = None):
+        balls = np.arange(self.n) if balls is None else np.flatnonzero(balls)
+        self.p[balls] = np.random.rand(balls.size, 2)*5 if self.start is None else self.start
+        self.v[balls] = 0.0
+        self.time[balls] = 0.0
+
+    def observation(self):
+        return self.p.copy()
+
+    #command: acceleration of the balls (n, 2)
+    def step(self, dt, command):
+        self.v += dt*np.asarray(command, dtype=float)
+        self.p += dt*self.v
+        self.time += dt
+        self.lose = np.any(self.p < 0, 1) | np.any(self.p > 5, 1)
+        if self.obstacles.shape[0] > 0:
+            distances = np.sqrt(np.sum((self.p[:,np.newaxis,:]-self.obstacles[np.newaxis,:,0:2])**2, 2))
+            self.lose |= np.any(distances < self.obstacles[:,2], 1)
+        self.win = np.sqrt(np.sum((self.p-self.win_area[0:2])**2, 1)) < self.win_area[2]
+        timeout = self.time >= self.time_limit
+        reward = np.where(self.lose, self.reward_lose, np.where(self.win, self.reward_win, self.reward_timeout*timeout))
+        done = self.lose | self.win | timeout
+        observation = self.observation()
+        self.reset(done)
+        return observation, reward, done
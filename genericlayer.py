@@ -1,6 +1,7 @@
 import inspect, os
 import dill as pickle
 import numpy as np
+import utils
 
 class StoreNetwork:
     def save(self, file):
@@ -24,6 +25,9 @@ class StoreNetwork:
             return net
 
 class GenericLayer(StoreNetwork):
+    #True if forward and backward accept a batch of inputs (batch_size, input_size), one for each row
+    batch = False
+
     def numeric_gradient(self,x):
         dx = 0.00000001
         fx = self.forward(x)
@@ -51,12 +55,111 @@ class GenericLayer(StoreNetwork):
     def on_message(self, message, *args, **kwargs):
         pass
 
+    def children(self):
+        children = []
+        for name in sorted(self.__dict__):
+            value = self.__dict__[name]
+            if isinstance(value, GenericLayer):
+                children.append((name, value))
+            elif type(value) is list:
+                for ind, element in enumerate(value):
+                    if isinstance(element, GenericLayer):
+                        children.append((name+'['+str(ind)+']', element))
+        return children
+
+    def walk(self, name = '', visited = None):
+        visited = set() if visited is None else visited
+        if id(self) in visited:
+            return []
+        visited.add(id(self))
+        layers = [(name, self)]
+        for child_name, child in self.children():
+            layers += child.walk(name+'.'+child_name if name else child_name, visited)
+        return layers
+
+    def weights(self):
+        return [(name, self.__dict__[name]) for name in sorted(self.__dict__) if isinstance(self.__dict__[name], utils.SharedWeights)]
+
+    #all the SharedWeights of the model in walk order, a weight shared by more layers only once
+    def shared_weights(self):
+        weights = []
+        ids = set()
+        for name, layer in self.walk():
+            for weight_name, weight in layer.weights():
+                if id(weight) not in ids:
+                    ids.add(id(weight))
+                    weights.append((name+'.'+weight_name if name else weight_name, weight))
+        return weights
+
+    #True if the layer and all its sublayers accept batches
+    def accepts_batch(self):
+        return self.batch and all([layer.accepts_batch() for name, layer in self.children()])
+
+    #changes every time a weight of the model is updated
+    def weights_version(self):
+        return tuple([(id(weight), weight.version) for name, weight in self.shared_weights()])
+
     def forward(self, x, update = False):
         return x
 
     def backward(self, dJdy, optimizer = None):
         return dJdy
 
+    #multiply-adds of the matrix products of forward and backward of the layer alone for one sample
+    def forward_macs(self):
+        return 0
+
+    def backward_macs(self):
+        return 0
+
+    #cost of every layer of the model tree for a batch of inputs with input_shape (a list of shapes for more inputs):
+    #output shape, parameters (the shared weights counted in the first layer), multiply-adds of the matrix
+    #products of forward and backward and bytes of the new outputs. The multiply-adds are counted only for
+    #the layers with a weight matrix product (LinearLayer, MWeightLayer), the other layers report 0.
+    #The shapes are inferred with a forward of zeros on the model, then the attributes and the arrays
+    #of the layers and of the shared weights and the random state are restored.
+    #With window_size the cost is of a training window of a recurrent model (a forward for every node).
+    def summary(self, input_shape, batch_size = 1, window_size = None):
+        objects = [layer for path, layer in self.walk()]+[weight for name, weight in self.shared_weights()]
+        states = [(layer, save_state(layer)) for layer in objects]
+        random_state = np.random.get_state()
+        try:
+            return self.probe(input_shape, batch_size, window_size)
+        finally:
+            for layer, state in states:
+                restore_state(layer, state)
+            np.random.set_state(random_state)
+
+    def probe(self, input_shape, batch_size, window_size):
+        if window_size is not None:
+            self.on_message('init_nodes', window_size)
+        rows = []
+        seen = set()
+        outputs = {}
+        for path, layer in self.walk(self.__class__.__name__):
+            params = 0
+            for name, weight in layer.weights():
+                if id(weight) not in seen:
+                    seen.add(id(weight))
+                    params += weight.W.size
+                    #the weights returned by a layer (VWeightLayer) are not activations
+                    bytes_of(weight.get(), outputs)
+            row = {'path': path, 'layer': layer.__class__.__name__, 'input_shape': None, 'output_shape': None, 'params': params, 'calls': 0,
+                   'forward_macs': 0, 'backward_macs': 0, 'activation_bytes': 0}
+            layer.__dict__['forward'] = summary_forward(layer, row, batch_size, outputs)
+            rows.append(row)
+        if type(input_shape) is list:
+            x = [np.zeros(shape) for shape in input_shape]
+        else:
+            x = np.zeros(input_shape)
+        bytes_of(x, outputs)
+        if window_size is None:
+            self.forward(x)
+        else:
+            for step in range(window_size):
+                self.forward(x, True)
+        return rows
+
     def printlayer(self, level):
         strlab = self.__class__.__name__
         if hasattr(self,'printelements'):
@@ -67,6 +170,70 @@ class GenericLayer(StoreNetwork):
     def __str__(self):
         return self.printlayer(1)
 
+#attributes of the layer (or of the shared weights), with the content of the lists, of the dicts and of the
+#arrays changed in place by forward: they are restored in place, so the references held by other objects stay valid
+def save_state(layer):
+    state = {}
+    for name, value in layer.__dict__.items():
+        if type(value) is list:
+            state[name] = (value, list(value))
+        elif type(value) is dict:
+            state[name] = (value, dict(value))
+        elif isinstance(value, np.ndarray) and value.flags.writeable:
+            state[name] = (value, np.array(value))
+        else:
+            state[name] = (value, None)
+    return state
+
+def restore_state(layer, state):
+    layer.__dict__.clear()
+    for name, (value, content) in state.items():
+        if type(value) is list:
+            value[:] = content
+        elif type(value) is dict:
+            value.clear()
+            value.update(content)
+        elif content is not None:
+            value[...] = content
+        layer.__dict__[name] = value
+
+def shape_of(value):
+    if type(value) in [list, tuple]:
+        return [shape_of(element) for element in value]
+    return np.shape(value)
+
+#bytes of the arrays in value not already in outputs (the output of a container is the output of a sublayer)
+def bytes_of(value, outputs):
+    if type(value) in [list, tuple]:
+        return sum([bytes_of(element, outputs) for element in value])
+    if id(value) in outputs:
+        return 0
+    #the outputs are kept to not reuse their ids
+    outputs[id(value)] = value
+    return np.asarray(value).nbytes
+
+def summary_forward(layer, row, batch_size, outputs):
+    method = layer.forward
+    def forward(x, update = False):
+        y = method(x, update)
+        row['input_shape'] = shape_of(x)
+        row['output_shape'] = shape_of(y)
+        row['calls'] += 1
+        row['forward_macs'] += layer.forward_macs()*batch_size
+        row['backward_macs'] += layer.backward_macs()*batch_size
+        row['activation_bytes'] += bytes_of(y, outputs)*batch_size
+        return y
+    return forward
+
+#the layers not called in the forward and without parameters are not shown
+def format_summary(rows):
+    lines = ['%-50s %-24s %-12s %10s %18s %18s %14s' % ('path', 'layer', 'output', 'params', 'fwd matmul MACs', 'bwd matmul MACs', 'activations')]
+    for row in rows:
+        if row['calls'] > 0 or row['params'] > 0:
+            lines.append('%-50s %-24s %-12s %10d %18d %18d %14d' % (row['path'], row['layer'], str(row['output_shape']), row['params'], row['forward_macs'], row['backward_macs'], row['activation_bytes']))
+    lines.append('%-50s %-24s %-12s %10d %18d %18d %14d' % tuple(['total', '', ''] + [sum([row[key] for row in rows]) for key in ['params', 'forward_macs', 'backward_macs', 'activation_bytes']]))
+    return '\n'.join(lines)
+
 class WithNet(GenericLayer):
     def __init__(self, net):
         self.net = net
@@ -0,0 +1,157 @@
+import multiprocessing
+import numpy as np
+
+from optimizers import Optimizer
+
+#Gradient checker for layers and whole models.
+#The checked function is the scalar f(x) = sum(v*model.forward(x)) with v random,
+#so the analytic gradients are the ones given by model.backward(v): the gradient
+#of the input and the gradient accumulated in dW of every SharedWeights in the model.
+#The numeric gradients are computed with central differences, coordinate by coordinate
+#(optionally sharded in a process pool) or, with directions = k, along k random
+#directions that perturb all the coordinates at once (2 forwards for each direction).
+#A gradient passes when |analytic-numeric| <= atol+rtol*|numeric| for every entry.
+
+class GradientCollector(Optimizer):
+    def update_dW(self, weight, dJdW):
+        weight.dW += dJdW
+        self.weight_list[weight.W.ctypes.data] = weight
+
+def flat_size(x):
+    if type(x) is list:
+        return sum([flat_size(element) for element in x])
+    return np.size(x)
+
+def flatten(x):
+    if type(x) is list or (type(x) is np.ndarray and x.dtype == object):
+        return np.hstack([flatten(element) for element in x])
+    return np.array(x, dtype=float).ravel()
+
+def unflatten(vect, like):
+    if type(like) is list:
+        out = []
+        a = 0
+        for element in like:
+            b = a + flat_size(element)
+            out.append(unflatten(vect[a:b], element))
+            a = b
+        return out
+    return vect.reshape(np.shape(like))
+
+def relative_error(analytic, numeric):
+    return np.max(np.abs(analytic-numeric)/np.maximum(np.abs(analytic)+np.abs(numeric), 1e-12))
+
+_checker = None
+
+def _numeric_shard(args):
+    key, indices = args
+    return _checker.numeric_coordinates(key, indices)
+
+class GradientChecker():
+    def __init__(self, model, x, dx = 1e-5, atol = 1e-5, rtol = 1e-3, directions = None, processes = None, chunk_size = 256):
+        self.model = model
+        self.x = x
+        self.dx = dx
+        self.atol = atol
+        self.rtol = rtol
+        self.directions = directions
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.x_flat = flatten(x)
+        self.v = None
+        self.weights = model.shared_weights()
+
+    def f(self, x):
+        return np.sum(self.v*flatten(self.model.forward(x)))
+
+    def analytic(self):
+        y = self.model.forward(self.x)
+        self.v = np.random.randn(flat_size(y))
+        old_dW = [weight.dW.copy() for name, weight in self.weights]
+        for name, weight in self.weights:
+            weight.dW.fill(0.0)
+
+        dJdx = self.model.backward(unflatten(self.v, y), GradientCollector())
+        gradients = {'input': flatten(dJdx)}
+        for (name, weight), dW in zip(self.weights, old_dW):
+            gradients[name] = np.array(weight.dW, dtype=float).ravel()
+            weight.dW[...] = dW
+        return gradients
+
+    def perturbed(self, key, delta):
+        if key == 'input':
+            return self.f(unflatten(self.x_flat+delta, self.x))
+        weight = dict(self.weights)[key]
+        W = weight.W.copy()
+        weight.W += delta.reshape(weight.W.shape)
+        fx = self.f(self.x)
+        weight.W[...] = W
+        return fx
+
+    def size(self, key):
+        if key == 'input':
+            return self.x_flat.size
+        return dict(self.weights)[key].W.size
+
+    def numeric_coordinates(self, key, indices):
+        size = self.size(key)
+        numeric = np.zeros(len(indices))
+        delta = np.zeros(size)
+        for i, ind in enumerate(indices):
+            delta[ind] = self.dx
+            numeric[i] = (self.perturbed(key, delta)-self.perturbed(key, -delta))/(2*self.dx)
+            delta[ind] = 0.0
+        return numeric
+
+    def numeric(self, key):
+        global _checker
+        indices = np.arange(self.size(key))
+        chunks = [indices[a:a+self.chunk_size] for a in range(0, indices.size, self.chunk_size)]
+        if self.processes is None or self.processes <= 1 or len(chunks) <= 1:
+            return np.hstack([self.numeric_coordinates(key, chunk) for chunk in chunks])
+        _checker = self
+        pool = multiprocessing.Pool(self.processes)
+        try:
+            return np.hstack(pool.map(_numeric_shard, [(key, chunk) for chunk in chunks]))
+        finally:
+            pool.close()
+            pool.join()
+            _checker = None
+
+    def directional(self, key, gradient):
+        analytic = np.zeros(self.directions)
+        numeric = np.zeros(self.directions)
+        for i in range(self.directions):
+            direction = np.random.randn(gradient.size)
+            direction /= np.linalg.norm(direction)
+            analytic[i] = gradient.dot(direction)
+            numeric[i] = (self.perturbed(key, self.dx*direction)-self.perturbed(key, -self.dx*direction))/(2*self.dx)
+        return analytic, numeric
+
+    def check(self):
+        gradients = self.analytic()
+        report = []
+        for key in ['input']+[name for name, weight in self.weights]:
+            if self.directions is None:
+                analytic = gradients[key]
+                numeric = self.numeric(key)
+            else:
+                analytic, numeric = self.directional(key, gradients[key])
+            abs_error = np.abs(analytic-numeric)
+            report.append({
+                'name': key,
+                'size': gradients[key].size,
+                'max_abs_error': np.max(abs_error) if analytic.size else 0.0,
+                'max_rel_error': relative_error(analytic, numeric) if analytic.size else 0.0,
+                'passed': bool(np.all(abs_error <= self.atol+self.rtol*np.abs(numeric))),
+            })
+        return report
+
+def check_gradient(model, x, **kwargs):
+    return GradientChecker(model, x, **kwargs).check()
+
+def format_report(report):
+    lines = ['%-40s %8s %14s %14s %s' % ('name', 'size', 'max_abs_error', 'max_rel_error', 'status')]
+    for row in report:
+        lines.append('%-40s %8d %14.3e %14.3e %s' % (row['name'], row['size'], row['max_abs_error'], row['max_rel_error'], 'ok' if row['passed'] else 'FAILED'))
+    return '\n'.join(lines)
@@ -7,45 +7,80 @@ import utils
 
 
 class LinearLayer(GenericLayer):
+    batch = True
+
     def __init__(self, input_size, output_size, weights ='gaussian', L1 = 0.0, L2 = 0.0):
         self.input_size = input_size
         self.output_size = output_size
         self.W = utils.SharedWeights.get_or_create(weights, input_size + 1, output_size, L1, L2)
 
+    #x can be a batch of inputs (batch_size, input_size), one for each row
     def forward(self, x, update = False):
+        if np.ndim(x) == 2:
+            self.x = np.hstack([x, np.ones([x.shape[0], 1])])
+            return self.x.dot(self.W.get().reshape(self.output_size, -1).T)
         self.x = np.hstack([x, 1])
         return self.W.get().dot(self.x)
 
     def backward(self, dJdy, optimizer = None):
-        dJdx = self.W.get()[:, 0:self.input_size].T.dot(dJdy)
+        if np.ndim(dJdy) == 2:
+            dJdx = dJdy.dot(self.W.get().reshape(self.output_size, -1)[:, 0:self.input_size])
+        else:
+            dJdx = self.W.get()[:, 0:self.input_size].T.dot(dJdy)
         if optimizer:
             optimizer.update_dW(self.W, self.dJdW_gradient(dJdy))
         return dJdx
 
     def dJdW_gradient(self, dJdy):
+        if np.ndim(dJdy) == 2:
+            return dJdy.T.dot(self.x).reshape(self.W.get().shape)
         dJdW = np.multiply(np.matrix(self.x).T, dJdy).T
         return dJdW
 
+    def forward_macs(self):
+        return self.W.get().size
+
+    #dJdx and dJdW
+    def backward_macs(self):
+        return 2*self.W.get().size
+
 class MWeightLayer(GenericLayer):
+    batch = True
+
     def __init__(self, input_size, output_size, weights ='gaussian', L1 = 0.0, L2 = 0.0):
         self.input_size = input_size
         self.output_size = output_size
         self.W = utils.SharedWeights.get_or_create(weights, input_size, output_size, L1, L2)
 
+    #x can be a batch of inputs (batch_size, input_size), one for each row
     def forward(self, x, update = False):
         self.x = x
+        if np.ndim(x) == 2:
+            return self.x.dot(self.W.get().reshape(self.output_size, self.input_size).T)
         return self.W.get().dot(self.x)
 
     def backward(self, dJdy, optimizer = None):
-        dJdx = self.W.get().T.dot(dJdy)
+        if np.ndim(dJdy) == 2:
+            dJdx = dJdy.dot(self.W.get().reshape(self.output_size, self.input_size))
+        else:
+            dJdx = self.W.get().T.dot(dJdy)
         if optimizer:
             optimizer.update_dW(self.W, self.dJdW_gradient(dJdy))
         return dJdx
 
     def dJdW_gradient(self, dJdy):
+        if np.ndim(dJdy) == 2:
+            return dJdy.T.dot(self.x).reshape(self.W.get().shape)
         dJdW = np.multiply(np.matrix(self.x).T, dJdy).T
         return dJdW
 
+    def forward_macs(self):
+        return self.W.get().size
+
+    #dJdx and dJdW
+    def backward_macs(self):
+        return 2*self.W.get().size
+
 class VWeightLayer(GenericLayer):
     def __init__(self, size, weights ='gaussian'):
         self.size = size
@@ -78,22 +113,23 @@ class Lock(GenericLayer):
         return self.net.backward(dJdy)
 
 class SoftMaxLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         # print 'xS'+str(x)
-        exp_x = np.exp(x-np.max(x))
+        exp_x = np.exp(x-np.max(x,-1,keepdims=True))
         # print 'exp_x'+str(exp_x)
-        self.y = exp_x/np.sum(exp_x)
+        self.y = exp_x/np.sum(exp_x,-1,keepdims=True)
         return self.y
 
+    #dJdx_i = y_i*(dJdy_i-sum_j(y_j*dJdy_j))
     def backward(self, dJdy, optimizer = None):
-        dJdx = np.zeros(dJdy.size)
-        for i in range(self.y.size):
-            aux_y = -self.y.copy()
-            aux_y[i] = (1-self.y[i])
-            dJdx[i] = self.y[i]*aux_y.dot(dJdy)
-        return dJdx
+        dJdy = np.asarray(dJdy, dtype=float)
+        return self.y*(dJdy-np.sum(self.y*dJdy,-1,keepdims=True))
 
 class HeavisideLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         self.y = (x >= 0)*1.0
         return self.y
@@ -102,6 +138,8 @@ class HeavisideLayer(GenericLayer):
         return dJdy
 
 class SignLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         self.y = np.sign(x)
         return self.y
@@ -110,6 +148,8 @@ class SignLayer(GenericLayer):
         return dJdy
 
 class TanhLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         self.y = np.tanh(x)
         return self.y
@@ -119,6 +159,8 @@ class TanhLayer(GenericLayer):
         return (1.-self.y ** 2) * dJdy
 
 class SigmoidLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         self.y = 1/(1+np.exp(-x))
         return self.y
@@ -127,6 +169,8 @@ class SigmoidLayer(GenericLayer):
         return self.y*(1-self.y)*dJdy
 
 class ReluLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         self.x = x
         return np.maximum(0,x)
@@ -135,6 +179,8 @@ class ReluLayer(GenericLayer):
         return np.maximum(0,self.x > 0)*dJdy
 
 class NegativeLayer(GenericLayer):
+    batch = True
+
     def forward(self, x, update = False):
         return -x
 
@@ -161,6 +207,8 @@ class MulLayer(GenericLayer):
         return np.array([element*dJdy for element in dJdx])
 
 class NormalizationLayer(GenericLayer):
+    batch = True
+
     def __init__(self, min_in, max_in, min_out = 0, max_out = 1):
         self.min_in = min_in
         self.max_in = max_in
@@ -174,12 +222,14 @@ class NormalizationLayer(GenericLayer):
         return dJdy*(self.max_out-self.min_out)/(self.max_in-self.min_in)
 
 class RandomGaussianLayer(GenericLayer):
+    batch = True
+
     def __init__(self, sigma = 1):
         self.sigma = sigma
 
     def forward(self, x, update = False):
         if update == True:
-            self.y = x + np.random.normal(0,self.sigma,size=x.size)
+            self.y = x + np.random.normal(0,self.sigma,size=np.shape(x))
         else:
             self.y = x
         return self.y
@@ -3,17 +3,21 @@ from genericlayer import GenericLayer
 
 class HuberLoss(GenericLayer):
     def __init__(self, delta = 1):
-        self.delta = 1
+        self.delta = delta
 
     def forward(self, x, update = False):
         return self.loss(x, self.t)
 
+    #elementwise, y and t can be batches (a sample for each row):
+    #quadratic for |y-t| <= delta, linear outside
     def loss(self, y, t):
         self.t = t
-        return np.array([0.5*(ti-yi)**2 if np.abs(yi) <= self.delta else self.delta*(np.abs(ti-yi)-1/2*self.delta) for (ti,yi) in zip(y,t)])
+        y, t = np.asarray(y, dtype=float), np.asarray(t, dtype=float)
+        return np.where(np.abs(y-t) <= self.delta, 0.5*(y-t)**2, self.delta*(np.abs(y-t)-0.5*self.delta))
 
     def dJdy_gradient(self, y, t):
-        return np.array([(yi - ti) if np.abs(yi) <= self.delta else -self.delta*np.sign(ti-yi) for (ti,yi) in zip(y,t)])
+        y, t = np.asarray(y, dtype=float), np.asarray(t, dtype=float)
+        return np.where(np.abs(y-t) <= self.delta, y-t, self.delta*np.sign(y-t))
 
 
 class SquaredLoss(GenericLayer):
@@ -52,11 +56,12 @@ class CrossEntropyLoss(GenericLayer):
         return self.loss(x, self.t)
 
     #Here max y is neglected
+    #the sums are on the last axis, y and t can be batches (a sample for each row)
     def loss(self, y, t):
         self.t = t
-        totlog = np.log(np.sum(np.exp(y)))
+        totlog = np.log(np.sum(np.exp(y),-1,keepdims=True))
         return t*(totlog - y)
 
     def dJdy_gradient(self, y, t):
-        exp_y = np.exp(y-np.max(y))
-        return (exp_y/np.sum(exp_y))-t
\ No newline at end of file
+        exp_y = np.exp(y-np.max(y,-1,keepdims=True))
+        return (exp_y/np.sum(exp_y,-1,keepdims=True))-t
\ No newline at end of file
@@ -0,0 +1,98 @@
+import numpy as np
+from utils import SharedWeights
+from genericlayer import GenericLayer
+
+#Memory held by a model tree, layer by layer (RNN nodes included, as RNN.nodes[i]):
+#- weights: W of the SharedWeights of the layer,
+#- gradients: dW of the SharedWeights of the layer,
+#- optimizer: state of the optimizer for the weights of the layer (velocity, r, ...),
+#- activations: the other arrays held by the layer (x, y, x_group, y_group, state, dJdstate, ...).
+#A buffer is counted once, in the first layer of the walk that holds it: the SharedWeights shared
+#by more layers and the arrays shared by more layers (or views of the same array) are not counted twice.
+#MemoryInspector(model) records the peak of the memory of the model, Trainer(memory = inspector)
+#samples it after forward, backward and update of every minibatch.
+
+CATEGORIES = ['weights', 'gradients', 'optimizer', 'activations']
+
+#bytes of the arrays in value (array, list, tuple or dict of arrays) not already in seen
+def array_bytes(value, seen):
+    if isinstance(value, np.ndarray):
+        base = value
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return base.nbytes
+    if type(value) in [list, tuple]:
+        return sum([array_bytes(element, seen) for element in value])
+    if type(value) is dict:
+        return sum([array_bytes(element, seen) for element in value.values()])
+    return 0
+
+def layer_bytes(layer, optimizer, seen):
+    usage = dict([(category, 0) for category in CATEGORIES])
+    for name, weight in layer.weights():
+        if id(weight) in seen:
+            continue
+        seen.add(id(weight))
+        usage['weights'] += array_bytes(weight.W, seen)
+        usage['gradients'] += array_bytes(weight.dW, seen)
+        if optimizer is not None:
+            usage['optimizer'] += array_bytes(optimizer.weight_params.get(weight.W.ctypes.data, {}), seen)
+    for name in sorted(layer.__dict__):
+        value = layer.__dict__[name]
+        if not isinstance(value, SharedWeights) and not isinstance(value, GenericLayer):
+            usage['activations'] += array_bytes(value, seen)
+    return usage
+
+#list of the layers of the model with path, class and bytes by category, of the layer alone ('own')
+#and of the layer with all its sublayers ('total')
+def inspect(model, optimizer = None):
+    seen = set()
+    report = []
+    rows = {}
+    for path, layer in model.walk(model.__class__.__name__):
+        own = layer_bytes(layer, optimizer, seen)
+        own['bytes'] = sum(own.values())
+        row = {'path': path, 'layer': layer.__class__.__name__, 'own': own, 'total': dict(own)}
+        report.append(row)
+        rows[path] = row
+    for row in report:
+        path = row['path']
+        while '.' in path:
+            path = path[:path.rfind('.')]
+            if path in rows:
+                for key in row['own']:
+                    rows[path]['total'][key] += row['own'][key]
+    return report
+
+def format_report(report, min_bytes = 0):
+    lines = ['%-50s %-24s %12s %12s %12s %12s %12s' % tuple(['path', 'layer'] + CATEGORIES + ['total'])]
+    for row in report:
+        if row['total']['bytes'] >= min_bytes:
+            lines.append('%-50s %-24s %12d %12d %12d %12d %12d' % tuple([row['path'], row['layer']] + [row['own'][category] for category in CATEGORIES] + [row['total']['bytes']]))
+    return '\n'.join(lines)
+
+class MemoryInspector():
+    def __init__(self, model, optimizer = None):
+        self.model = model
+        self.optimizer = optimizer
+        self.samples = 0
+        self.reset_peak()
+
+    def reset_peak(self):
+        self.peak = 0
+        self.peak_phase = None
+        self.peak_report = None
+
+    #bytes held by the model now, the report is kept if it is the peak
+    def sample(self, phase = None, optimizer = None):
+        report = inspect(self.model, optimizer or self.optimizer)
+        total = report[0]['total']['bytes']
+        self.samples += 1
+        if total > self.peak:
+            self.peak = total
+            self.peak_phase = phase
+            self.peak_report = report
+        return total
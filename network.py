@@ -3,6 +3,8 @@ from itertools import izip
 from genericlayer import GenericLayer, WithElements, WithNet
 
 class Sequential(WithElements, GenericLayer):
+    batch = True
+
     def __init__(self, *args):
         WithElements.__init__(self, *args)
 
@@ -26,6 +26,7 @@ class Optimizer(object):
             if self.clip is not None:
                 np.clip(self.weight_list[weight].dW, -self.clip, self.clip, out=self.weight_list[weight].dW)
             self.update_W(self.weight_list[weight])
+            self.weight_list[weight].version += 1
 
 class GradientDescent(Optimizer):
     def __init__(self, learning_rate, **kwargs):
@@ -1,3 +1,5 @@
+import collections
+import weakref
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -73,18 +75,58 @@ class ShowTraining():
         plt.ioff()
 
 class Printer2D():
+    #cache_size: number of grids cached for each model
+    def __init__(self, cache_size = 4):
+        #model -> OrderedDict grid -> (weights version, activations), the entries of a model
+        #are dropped with the model
+        self.cache = weakref.WeakKeyDictionary()
+        self.cache_size = cache_size
+
+    #the grid is forwarded as one batch if the model accepts batches, one sample at time otherwise
     def forward_all(self, model, xs):
-        return map(lambda x: model.forward(x), xs)
+        xs = np.asarray(xs, dtype=float)
+        if model.accepts_batch():
+            return model.forward(xs)
+        return np.array([model.forward(x) for x in xs])
+
+    #inputs and outputs of all the layers of a Sequential model with one pass on the grid
+    def activations(self, model, xs):
+        outputs = [np.asarray(xs, dtype=float)]
+        for layer in getattr(model, 'elements', [model]):
+            outputs.append(self.forward_all(layer, outputs[-1]))
+        return outputs
+
+    #grid: (x_min, y_min, x_max, y_max, points)
+    #the activations are computed again only when the weights of the model change, that is when the
+    #version of a SharedWeights changes: a write in place in W that does not increment the version
+    #(SharedWeights.version) leaves the old activations in the cache.
+    #The models without SharedWeights (no version of the weights) are never cached.
+    def cached_activations(self, model, grid):
+        version = model.weights_version()
+        if not version:
+            X, Y = self.grid(grid[0:2], grid[2:4], grid[4])
+            return self.activations(model, np.c_[X.ravel(), Y.ravel()])
+        grids = self.cache.setdefault(model, collections.OrderedDict())
+        if grid not in grids or grids[grid][0] != version:
+            X, Y = self.grid(grid[0:2], grid[2:4], grid[4])
+            grids.pop(grid, None)
+            grids[grid] = (version, self.activations(model, np.c_[X.ravel(), Y.ravel()]))
+            while len(grids) > self.cache_size:
+                grids.popitem(last=False)
+        return grids[grid][1]
+
+    def grid(self, min, max, points = 100):
+        x_range = np.linspace(min[0],max[0],points)
+        y_range = np.linspace(min[1],max[1],points)
+        return np.meshgrid(x_range, y_range)
 
     def draw_decision_surface(self, figure_ind, model, data):
         # max = np.max([i[0] for i in data],0)
         # min = np.min([i[0] for i in data],0)
         max = np.max(data,0)
         min = np.min(data,0)
-        x_range = np.linspace(min[0]-0.5,max[0]+0.5,100)
-        y_range = np.linspace(min[1]-0.5,max[1]+0.5,100)
-        X, Y = np.meshgrid(x_range, y_range)
-        Z = np.argmax(self.forward_all(model, np.c_[X.ravel(), Y.ravel()]), axis=1)
+        X, Y = self.grid(min-0.5, max+0.5)
+        Z = np.argmax(self.cached_activations(model, (min[0]-0.5, min[1]-0.5, max[0]+0.5, max[1]+0.5, 100))[-1], axis=1)
         Z = Z.reshape(X.shape)
         # cs = plt.contourf(xx, yy, Z, cmap='Paired')
         plt.figure(figure_ind)
@@ -95,22 +137,14 @@ class Printer2D():
     def print_model(self, figure_ind, model, x_list, print_layers = None):
         max = np.max(x_list,0)
         min = np.min(x_list,0)
-        x_range = np.linspace(min[0],max[0],100)
-        y_range = np.linspace(min[1],max[1],100)
-        X, Y = np.meshgrid(x_range, y_range)
+        X, Y = self.grid(min, max)
         if print_layers == None:
             print_layers = range(len(model.elements))
+        activations = self.cached_activations(model, (min[0], min[1], max[0], max[1], 100))
         for ind in print_layers:
             plt.figure(figure_ind+ind)
-            z_vett = []
-            for x_ind in xrange(X.shape[0]):
-                for y_ind in xrange(Y.shape[1]):
-                    aux_x = np.array([X[x_ind][y_ind],Y[x_ind][y_ind]])
-                    for layer in model.elements[:ind]:
-                        aux_x = layer.forward(aux_x)
-                    z_vett.append(aux_x)
-
-            z_array = np.array(z_vett)
+            #input of the layer ind
+            z_array = activations[ind].reshape(X.size, -1)
             for exit in range(z_array.shape[1]):
                 z_array_out = z_array[:,exit]
                 Z = z_array_out.reshape(X.shape)
@@ -1,9 +1,8 @@
 import numpy as np
-import collections
-import random
 
 import layers
 import utils
+from replaymemory import ReplayMemory, PrioritizedReplayMemory
 
 
 
@@ -20,7 +19,7 @@ class Ase(layers.GenericLayer):
         self.x = x
         self.y = np.sign(self.W.dot(x)+np.random.normal(0,self.sigma))
         self.e = self.delta*self.e+(1-self.delta)*self.y*self.x
-        return utils.to_one_hot_vect(self.y/2.0+1.0,2)
+        return utils.to_one_hot_vect(int(self.y/2.0+1.0),2)
 
     def reinforcement(self, x, r): #r>1 success e r<1 fail
         self.W += self.learning_rate * r * self.e
@@ -65,10 +64,56 @@ class AseAce(layers.GenericLayer):
         self.x = x
         return self.ase.reinforcement(x, r+self.ace.reinforcement(x, r))
 
+#population of K AseAce controllers stepped together: weights and traces are (K, state_size)
+#matrices, delta, learning_rate, sigma and gamma can be arrays with a value for each controller.
+#x is the state shared by all the controllers or a matrix with a state for each controller,
+#the output is the action (0 or 1) of each controller.
+class AseAcePopulation(layers.GenericLayer):
+    def __init__(self, population_size, state_size, delta, weights = 'zeros', learning_rate=0.1, sigma = 1, gamma = 0.95):
+        self.population_size = population_size
+        self.input_size = state_size
+        self.delta = np.ones(population_size)*delta
+        self.learning_rate = np.ones(population_size)*learning_rate
+        self.sigma = np.ones(population_size)*sigma
+        self.gamma = np.ones(population_size)*gamma
+        self.ase_W = utils.define_weights(weights, state_size, population_size).reshape(population_size, state_size)
+        self.ace_W = utils.define_weights(weights, state_size, population_size).reshape(population_size, state_size)
+        self.ase_e = np.zeros([population_size, state_size])
+        self.ace_e = np.zeros([population_size, state_size])
+        self.p = np.zeros(population_size)
+        self.y = np.zeros(population_size)
+
+    def forward(self, x, update = False):
+        return self.step(x, 0)
 
+    def reinforcement(self, x, r):
+        return self.step(x, r)
+
+    #the same updates of AseAce: the critic (Ace) gives the internal reinforcement of the actor (Ase)
+    def step(self, x, r):
+        self.x = np.broadcast_to(x, self.ase_W.shape)
+        delta = self.delta[:,np.newaxis]
+        value = np.sum(self.ace_W*self.x, 1)
+        critic = self.gamma*value-self.p
+        self.ace_e = delta*self.ace_e+(1-delta)*self.x
+        self.p = value
+        reinforcement = self.learning_rate*(r+critic)
+        self.ace_W += reinforcement[:,np.newaxis]*self.ace_e
+        self.ase_W += reinforcement[:,np.newaxis]*self.ase_e
+        self.y = np.sign(np.sum(self.ase_W*self.x, 1)+np.random.normal(0,self.sigma))
+        self.ase_e = delta*self.ase_e+(1-delta)*self.y[:,np.newaxis]*self.x
+        return (self.y/2.0+1.0).astype(int)
+
+
+#The states are integer ids or one-hot vectors of length state_size.
+#table: None for the dense Q[action, state] array, or a table with values(states) and
+#add(actions, states, deltas) as qtable.SparseQTable: with integer ids the state_size can be huge
 class Agent(layers.GenericLayer):
-    def __init__(self, state_size, action_size, learning_rate = 0.1, gamma = 0.95, policy = 'esp-greedy', epsilon = 0.3, sigma = 1):
-        self.Q = utils.define_weights('zeros', state_size, action_size)
+    def __init__(self, state_size, action_size, learning_rate = 0.1, gamma = 0.95, policy = 'esp-greedy', epsilon = 0.3, sigma = 1, table = None):
+        if table is None:
+            self.Q = utils.define_weights('zeros', state_size, action_size)
+        else:
+            self.Q = table
         self.action_size = action_size
         self.learning_rate = learning_rate
         self.epsilon = epsilon
@@ -84,41 +129,132 @@ class Agent(layers.GenericLayer):
         }
         self.policy = self.policies.get(policy)
 
+    #id of the state x, an integer id or a one-hot vector
+    def state(self, x):
+        if np.ndim(x) == 0:
+            return int(x)
+        return np.argmax(x)
+
+    #action values of the state x
+    def values(self, x):
+        if isinstance(self.Q, np.ndarray):
+            return self.Q[:,x]
+        return self.Q.values(np.array([x]))[:,0]
+
+    def add(self, y, x, delta):
+        if isinstance(self.Q, np.ndarray):
+            self.Q[y,x] += delta
+        else:
+            self.Q.add(np.array([y]), np.array([x]), np.array([delta]))
+
     def greedy(self, x):
-        self.y = np.argmax(self.Q[:,x])
+        self.y = np.argmax(self.values(x))
         return self.y
 
     def eps_greedy(self, x):
+        values = self.values(x)
         if np.random.rand(1,1) < self.epsilon:
-            self.y = int(np.random.rand(1,1)*self.Q[:,x].size)
+            self.y = int(np.random.rand(1,1)*values.size)
         else:
-            self.y = np.argmax(self.Q[:,x])
+            self.y = np.argmax(values)
         return self.y
 
     def gaussian(self, x):
-        self.y = np.argmax(self.Q[:,x]+np.random.normal(0,self.sigma,size=self.Q[:,x].size))
+        values = self.values(x)
+        self.y = np.argmax(values+np.random.normal(0,self.sigma,size=values.size))
         return self.y
 
     def softmax(self, x):
         raise Exception('Not Implemented!')
 
     def forward(self, x, update = False):
-        self.x = np.argmax(x)
+        self.x = self.state(x)
         return utils.to_one_hot_vect(self.policy(self.x),self.action_size)
 
     def reinforcement(self, x, r):
-        self.Q[self.y,self.x] += self.learning_rate*(r+self.gamma*np.max(self.Q[:,np.argmax(x)])-self.Q[self.y,self.x])
+        self.add(self.y, self.x, self.learning_rate*(r+self.gamma*np.max(self.values(self.state(x)))-self.values(self.x)[self.y]))
+        return self.forward(x)
+
+#Tabular Q-learning of n environments together: the states and the actions are integer arrays
+#with one element for each environment, the policies choose all the actions in one call and
+#the TD updates are scattered in Q with np.add.at (the updates of the same cell are summed).
+#table: None for the dense Q[action, state] array, or a table with values(states) and
+#add(actions, states, deltas) as qtable.SparseQTable
+class BatchAgent(layers.GenericLayer):
+    def __init__(self, state_size, action_size, learning_rate = 0.1, gamma = 0.95, policy = 'eps-greedy', epsilon = 0.3, sigma = 1, table = None):
+        if table is None:
+            self.Q = utils.define_weights('zeros', state_size, action_size).reshape(action_size, state_size)
+        else:
+            self.Q = table
+        self.action_size = action_size
+        self.learning_rate = learning_rate
+        self.epsilon = epsilon
+        self.gamma = gamma
+        self.sigma = sigma
+        self.y = None
+        self.x = None
+        self.policies = {
+            'greedy' : self.greedy,
+            'eps-greedy' : self.eps_greedy,
+            'gaussian' : self.gaussian,
+            'softmax' : self.softmax
+        }
+        self.policy = self.policies.get(policy)
+
+    def values(self, x):
+        if isinstance(self.Q, np.ndarray):
+            return self.Q[:,x]
+        return self.Q.values(x)
+
+    def add(self, y, x, deltas):
+        if isinstance(self.Q, np.ndarray):
+            np.add.at(self.Q, (y, x), deltas)
+        else:
+            self.Q.add(y, x, deltas)
+
+    def greedy(self, x):
+        return np.argmax(self.values(x), 0)
+
+    def eps_greedy(self, x):
+        y = self.greedy(x)
+        explore = np.random.rand(y.size) < self.epsilon
+        y[explore] = np.random.randint(0, self.action_size, np.sum(explore))
+        return y
+
+    def gaussian(self, x):
+        return np.argmax(self.values(x)+np.random.normal(0,self.sigma,size=(self.action_size, x.size)), 0)
+
+    def softmax(self, x):
+        raise Exception('Not Implemented!')
+
+    def forward(self, x, update = False):
+        self.x = np.asarray(x, dtype=int)
+        self.y = self.policy(self.x)
+        return self.y
+
+    #x: the states reached with the last actions, done: the environments where the episode is ended
+    def reinforcement(self, x, r, done = False):
+        x = np.asarray(x, dtype=int)
+        target = r+self.gamma*np.max(self.values(x), 0)*(1-np.asarray(done, dtype=float))
+        Q_x = self.values(self.x)[self.y, np.arange(self.x.size)]
+        self.add(self.y, self.x, self.learning_rate*(target-Q_x))
         return self.forward(x)
 
 #Generic Agent
 #When the agent receive a reward, it performs a training.
 class GenericAgent(layers.GenericLayer):
+    target = None
+
     def __init__(self, model, action_size, memory_size, pole):
         self.model = model
         self.action_size = action_size
         self.memory_size = memory_size
-        self.states_history = collections.deque(maxlen = memory_size)
-        self.command_history = collections.deque(maxlen = memory_size)
+        #ring buffers of double length: every element is written in i and i+memory_size,
+        #so the last memory_size elements are always the contiguous slice [cursor, cursor+memory_size)
+        self.states_history = None
+        self.command_history = np.zeros([2*memory_size, action_size])
+        self.cursor = 0
+        self.count = 0
         self.e = np.tile(np.exp(-pole*np.linspace(0,1,memory_size)),(action_size,1)).T
         self.command = np.zeros(action_size)
 
@@ -150,23 +286,39 @@ class GenericAgent(layers.GenericLayer):
     #     self.command = to_one_hot_vect(np.argmax(self.net.forward(state)),self.output_size)
     #     return self.command
 
+    def remember(self, x):
+        if self.states_history is None:
+            self.states_history = np.zeros((2*self.memory_size,)+np.shape(x))
+        for history, value in [(self.states_history, x), (self.command_history, self.command)]:
+            history[self.cursor] = value
+            history[self.cursor+self.memory_size] = value
+        self.cursor = (self.cursor+1) % self.memory_size
+        self.count = min(self.count+1, self.memory_size)
+
+    #view of the last memory_size elements, from the oldest
+    def history(self, history):
+        return history[self.cursor:self.cursor+self.memory_size]
+
     def forward(self, x, update = False):
-        self.states_history.append(x)
-        self.command_history.append(self.command)
+        self.remember(x)
         self.command = utils.to_one_hot_vect(np.argmax(self.model.forward(x)),self.action_size)
         return self.command
 
     def reinforcement(self, x, r):
-        self.states_history.append(x)
-        self.command_history.append(self.command)
-        if len(self.command_history) >= self.memory_size:
+        self.remember(x)
+        if self.count >= self.memory_size:
             # print np.argmax(self.command_history,axis=1)
             if r != 0:
-                self.target = r*np.multiply(self.e,np.array(self.command_history))
+                #the targets are written in place in the same buffer at every step
+                if self.target is None:
+                    self.target = np.zeros_like(self.e)
+                np.multiply(self.e, self.history(self.command_history), out=self.target)
+                self.target *= r
                 # self.target = r*np.array(self.command_history)
-                self.trainer.learn_minibatch(
+                self.trainer.learn_minibatch_arrays(
                     self.model,
-                    zip(self.states_history,self.target),
+                    self.history(self.states_history),
+                    self.target,
                     self.loss,
                     self.optimiser,
                 )
@@ -175,18 +327,30 @@ class GenericAgent(layers.GenericLayer):
         return self.command
 
     def clear(self):
-        self.command_history.clear()
+        self.count = 0
 
 
 #Appunti
 #Q function e' la rete quindi io mi posso salvare lo stato che e' un input
 #e poi l'uscita mi da l'azione migliore trovata fino a quel momento
 class DeepAgent(layers.GenericLayer):
-    def __init__(self, Q, Q_hat, replay_memory_size, minibatch_size = 100, learning_rate = 0.1, gamma = 1, policy = 'eps-greedy', epsilon = 0.3, sigma = 0.5):
+    def __init__(self, Q, Q_hat, replay_memory_size, minibatch_size = 100, learning_rate = 0.1, gamma = 1, policy = 'eps-greedy', epsilon = 0.3, sigma = 0.5, replay_memory_file = None, prioritized = False, alpha = 0.6, beta = 0.4, target_update = None, batched = False):
         self.Q = Q
+        #Q_hat is the target network of the TD targets, synced with Q every target_update minibatches;
+        #with target_update None the targets are computed with Q itself
         self.Q_hat = Q_hat
+        self.target_update = target_update
+        self.batched = batched
+        if batched and not all([model.accepts_batch() for model in [Q, Q_hat] if model is not None]):
+            raise Exception('batched needs Q and Q_hat that accept batches!')
+        self.steps = 0
+        if target_update is not None:
+            self.update_target()
         self.D_size = replay_memory_size
-        self.D = collections.deque(maxlen = replay_memory_size)
+        if prioritized:
+            self.D = PrioritizedReplayMemory(replay_memory_size, replay_memory_file, alpha, beta)
+        else:
+            self.D = ReplayMemory(replay_memory_size, replay_memory_file)
         self.minibatch_size = minibatch_size
         self.learning_rate = learning_rate
         self.epsilon = epsilon
@@ -237,64 +401,67 @@ class DeepAgent(layers.GenericLayer):
         self.action = self.policy(self.x)
         return self.action
 
+    #copy of the weights of Q in Q_hat, the two networks must have the same structure
+    def update_target(self):
+        for (name, W), (name_hat, W_hat) in zip(self.Q.shared_weights(), self.Q_hat.shared_weights()):
+            if W is not W_hat:
+                np.copyto(W_hat.W, W.W)
+                W_hat.version += 1
+
+    def target_network(self):
+        return self.Q_hat if self.target_update is not None else self.Q
+
     def reinforcement(self, x, r, done):
-        self.D.append((self.x, self.action, r, x, done))
-        J_train_list = 0
-        dJdy_list = 0
+        self.D.append(self.x, self.action, r, x, done)
+        return self.learn()
+
+    #one update of Q with a minibatch sampled from the replay memory.
+    #With batched the minibatch is a matrix with a transition for each row: one forward of Q on the states,
+    #one forward of the target network on the next states and one backward of the whole batch,
+    #so all the layers of Q must accept batches (as LinearLayer, MWeightLayer and SoftMaxLayer).
+    #Otherwise every state is forwarded and backwarded alone.
+    def learn(self):
         if len(self.D) < self.minibatch_size:
-            return J_train_list, dJdy_list
-
-        minibatch = random.sample(self.D, self.minibatch_size)
-        #y is the target of the loss function
-        y = []
-        Q_out = []
-        states = []
-        for state, action, reward, next_state, done, in minibatch:
-            states.append(state)
-            #y_val = self.Q_hat.forward(state)
-            Q_out_val = self.Q.forward(state)#*utils.to_one_hot_vect(action,self.Q_out.size)
-            Q_out.append(Q_out_val)
-            if done == False:
-                # yj = r(t) + gamma * max_action(Q_hat(x(t+1),action))
-                yj = reward + self.gamma * np.max(self.Q.forward(next_state))
-            else:
-                # yj = r(t)
-                yj = reward
-            # yj = self.Q_hat.forward(next_state)
-            y_val = Q_out_val.copy()
-            y_val[action] = yj
-            # print (Q_out_val,y_val,action,yj)
-            # y_val = yj*utils.to_one_hot_vect(action,self.Q_out.size)
-            y.append(y_val)
-
-        # J_train_list, dJdy_list = self.trainer.learn_minibatch(
-        #     self.Q,
-        #     zip(states,y),
-        #     self.loss,
-        #     self.optimiser,
-        # )
-
-            J = self.loss.loss(Q_out_val,y_val)/self.minibatch_size
-            dJdy = self.loss.dJdy_gradient(Q_out_val,y_val)/self.minibatch_size
+            return 0, 0
+
+        indices = self.D.sample_indices(self.minibatch_size)
+        states, actions, rewards, next_states, dones = self.D.get(indices)
+        weights = self.D.weights(indices)
+        rows = np.arange(self.minibatch_size)
+        #the targets before the forward of the states, the backward needs the values of the forward of the state
+        if self.batched:
+            Q_next = self.target_network().forward(next_states)
+        else:
+            Q_next = np.array([self.target_network().forward(next_state) for next_state in next_states])
+        # yj = r(t) + gamma * max_action(Q_hat(x(t+1),action)), yj = r(t) if done
+        yj = rewards + self.gamma*np.max(Q_next, 1)*(~dones)
+
+        if self.batched:
+            Q_out = self.Q.forward(states)
+            #y is the target of the loss function, equal to Q_out except for the taken actions
+            y = Q_out.copy()
+            y[rows, actions] = yj
+            J = self.loss.loss(Q_out, y)/self.minibatch_size
+            dJdy = weights[:,np.newaxis]*self.loss.dJdy_gradient(Q_out, y)/self.minibatch_size
             self.Q.backward(dJdy, self.optimiser)
-
-            J_train_list += np.linalg.norm(J)
-            dJdy_list += np.linalg.norm(dJdy)
-
+        else:
+            Q_out = []
+            J = []
+            dJdy = []
+            for i, state in enumerate(states):
+                Q_out_val = self.Q.forward(state)
+                y_val = Q_out_val.copy()
+                y_val[actions[i]] = yj[i]
+                J.append(self.loss.loss(Q_out_val, y_val)/self.minibatch_size)
+                dJdy.append(weights[i]*self.loss.dJdy_gradient(Q_out_val, y_val)/self.minibatch_size)
+                self.Q.backward(dJdy[i], self.optimiser)
+                Q_out.append(Q_out_val)
+            Q_out, J, dJdy = np.array(Q_out), np.array(J), np.array(dJdy)
+        td_errors = yj-Q_out[rows, actions]
         self.optimiser.update_model()
+        self.D.update_priorities(indices, td_errors)
 
-
-        #print len(states)
-        # print (np.array(y),np.array(Q_out))
-        # print np.max(np.array(y)-np.array(Q_out))
-        #y = [minibatch[2][ind] + self.gamma * np.max(self.Q_hat.forward(minibatch[3][ind])) if done == 0 else minibatch[2][ind] for ind,done in enumerate(minibatch[4])]
-
-        # states = np.random.rand(100,2)
-        # y = []
-        # for x in states:
-        #     y.append(self.Q_hat.forward(x))
-
-
-
-
-        return J_train_list, dJdy_list
+        self.steps += 1
+        if self.target_update is not None and self.steps % self.target_update == 0:
+            self.update_target()
+        return np.sum(np.linalg.norm(J, axis=1)), np.sum(np.linalg.norm(dJdy, axis=1))
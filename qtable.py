@@ -0,0 +1,145 @@
+import numpy as np
+
+EMPTY = -1
+DELETED = -2
+
+#Sparse Q table for huge discrete state spaces (as np.ravel_multi_index of many discretized variables):
+#only the visited states have a row of action values, the other states have the default value.
+#The state ids are the keys of an open-addressing hash table (linear probing, load factor <= 1/2)
+#and the action-value rows are stored in a contiguous array. The state ids must be non negative,
+#the negative keys of the hash table mark the empty and the deleted slots.
+#With max_states, the least recently used states are evicted to make room for the new ones.
+#values(states) and add(actions, states, deltas) are the table interface of BatchAgent.
+class SparseQTable():
+    def __init__(self, action_size, default = 0.0, max_states = None, capacity = 1024):
+        self.action_size = action_size
+        self.default = default
+        self.max_states = max_states
+        size = 1
+        while size < capacity:
+            size *= 2
+        self.keys = EMPTY*np.ones(size, dtype=np.int64)
+        self.slots = np.zeros(size, dtype=np.int64)
+        self.filled = 0
+        self.used = 0
+        self.clock = 0
+        self.rows = np.zeros([0, action_size])
+        self.row_keys = np.zeros(0, dtype=np.int64)
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self.free = []
+
+    def __len__(self):
+        return self.used
+
+    def check(self, states):
+        states = np.asarray(states, dtype=np.int64)
+        if np.any(states < 0):
+            raise Exception('Negative state id!')
+        return states
+
+    #multiplicative hashing on the high bits
+    def hash(self, states):
+        bits = np.uint64(self.keys.size.bit_length()-1)
+        h = np.asarray(states, dtype=np.int64).astype(np.uint64)*np.uint64(11400714819323198485)
+        return (h >> (np.uint64(64)-bits)).astype(np.int64) if bits > 0 else np.zeros(np.size(states), dtype=np.int64)
+
+    #slot of every state, -1 for the states not in the table
+    def find(self, states):
+        states = np.asarray(states, dtype=np.int64)
+        found = -np.ones(states.size, dtype=np.int64)
+        positions = self.hash(states)
+        pending = np.arange(states.size)
+        while pending.size > 0:
+            keys = self.keys[positions[pending]]
+            hit = keys == states[pending]
+            found[pending[hit]] = positions[pending[hit]]
+            pending = pending[~hit & (keys != EMPTY)]
+            positions[pending] = (positions[pending]+1) & (self.keys.size-1)
+        return found
+
+    def rows_of(self, states):
+        found = self.find(states)
+        return np.where(found >= 0, self.slots[found], -1)
+
+    def rehash(self):
+        live = self.keys >= 0
+        keys = self.keys[live]
+        slots = self.slots[live]
+        size = self.keys.size*2 if 4*keys.size > self.keys.size else self.keys.size
+        self.keys = EMPTY*np.ones(size, dtype=np.int64)
+        self.slots = np.zeros(size, dtype=np.int64)
+        positions = self.hash(keys)
+        pending = np.arange(keys.size)
+        while pending.size > 0:
+            free = pending[self.keys[positions[pending]] == EMPTY]
+            #one key for each free slot, the others go on probing
+            first = free[np.unique(positions[free], return_index=True)[1]]
+            self.keys[positions[first]] = keys[first]
+            self.slots[positions[first]] = slots[first]
+            pending = np.setdiff1d(pending, first)
+            positions[pending] = (positions[pending]+1) & (size-1)
+        self.filled = keys.size
+
+    def new_row(self):
+        if not self.free:
+            old = self.rows.shape[0]
+            new = max(2*old, 16)
+            self.rows = np.vstack([self.rows, np.zeros([new-old, self.action_size])])
+            self.row_keys = np.hstack([self.row_keys, EMPTY*np.ones(new-old, dtype=np.int64)])
+            self.last_used = np.hstack([self.last_used, np.zeros(new-old, dtype=np.int64)])
+            self.free = range(new-1, old-1, -1)
+        return self.free.pop()
+
+    def insert(self, state):
+        if 2*(self.filled+1) > self.keys.size:
+            self.rehash()
+        row = self.new_row()
+        position = self.hash([state])[0]
+        while self.keys[position] >= 0:
+            position = (position+1) & (self.keys.size-1)
+        if self.keys[position] == EMPTY:
+            self.filled += 1
+        self.keys[position] = state
+        self.slots[position] = row
+        self.row_keys[row] = state
+        self.rows[row] = self.default
+        self.used += 1
+        return row
+
+    #evict the number least recently used states, the states used in the current step are kept:
+    #if they are more than max_states the table cannot stay within max_states
+    def evict(self, number):
+        if number <= 0:
+            return
+        live = np.flatnonzero((self.row_keys >= 0) & (self.last_used < self.clock))
+        if live.size < number:
+            raise Exception('More states in one step than max_states!')
+        victims = live[np.argsort(self.last_used[live], kind='mergesort')[:number]]
+        self.keys[self.find(self.row_keys[victims])] = DELETED
+        self.row_keys[victims] = EMPTY
+        self.free += list(victims)
+        self.used -= victims.size
+
+    #action values of the states (action_size, states), as Q[:, states] of the dense table
+    def values(self, states):
+        self.clock += 1
+        rows = self.rows_of(self.check(states))
+        visited = rows >= 0
+        self.last_used[rows[visited]] = self.clock
+        values = self.default*np.ones([self.action_size, rows.size])
+        values[:, visited] = self.rows[rows[visited]].T
+        return values
+
+    #Q[actions, states] += deltas, the deltas of the same cell are summed
+    def add(self, actions, states, deltas):
+        self.clock += 1
+        unique, inverse = np.unique(self.check(states), return_inverse=True)
+        rows = self.rows_of(unique)
+        self.last_used[rows[rows >= 0]] = self.clock
+        missing = np.flatnonzero(rows < 0)
+        if self.max_states is not None:
+            self.evict(self.used+missing.size-self.max_states)
+        for i in missing:
+            rows[i] = self.insert(unique[i])
+        self.last_used[rows] = self.clock
+        np.add.at(self.rows, (rows[inverse], actions), deltas)
@@ -0,0 +1,148 @@
+import numpy as np
+
+#Replay memory of the transitions (state, action, reward, next_state, done)
+#stored in preallocated arrays written as a ring buffer.
+#The arrays are allocated at the first append, when the state shape is known,
+#and with filename they are np.memmap files (filename_states.dat, ...) for memories larger than the RAM.
+class ReplayMemory():
+    def __init__(self, size, filename = None):
+        self.size = size
+        self.filename = filename
+        self.cursor = 0
+        self.count = 0
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.dones = None
+
+    def buffer(self, name, shape, dtype):
+        if self.filename is None:
+            return np.zeros((self.size,)+shape, dtype=dtype)
+        return np.memmap(self.filename+'_'+name+'.dat', dtype=dtype, mode='w+', shape=(self.size,)+shape)
+
+    def allocate(self, state):
+        shape = np.shape(state)
+        self.states = self.buffer('states', shape, float)
+        self.actions = self.buffer('actions', (), int)
+        self.rewards = self.buffer('rewards', (), float)
+        self.next_states = self.buffer('next_states', shape, float)
+        self.dones = self.buffer('dones', (), bool)
+
+    def append(self, state, action, reward, next_state, done):
+        if self.states is None:
+            self.allocate(state)
+        self.states[self.cursor] = state
+        self.actions[self.cursor] = action
+        self.rewards[self.cursor] = reward
+        self.next_states[self.cursor] = next_state
+        self.dones[self.cursor] = done
+        self.cursor = (self.cursor + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    #many transitions together, one for each row, returns the positions where they are stored
+    def extend(self, states, actions, rewards, next_states, dones):
+        if self.states is None:
+            self.allocate(states[0])
+        #only the last size transitions are kept, where the sequential appends would leave them
+        skip = max(len(actions)-self.size, 0)
+        keep = slice(skip, None)
+        positions = (self.cursor+skip+np.arange(len(actions)-skip)) % self.size
+        self.states[positions] = states[keep]
+        self.actions[positions] = actions[keep]
+        self.rewards[positions] = rewards[keep]
+        self.next_states[positions] = next_states[keep]
+        self.dones[positions] = dones[keep]
+        self.cursor = (self.cursor + len(actions)) % self.size
+        self.count = min(self.count + len(actions), self.size)
+        return positions
+
+    def __len__(self):
+        return self.count
+
+    def sample_indices(self, batch_size):
+        return np.random.randint(0, self.count, batch_size)
+
+    def get(self, indices):
+        return self.states[indices], self.actions[indices], self.rewards[indices], self.next_states[indices], self.dones[indices]
+
+    def sample(self, batch_size):
+        return self.get(self.sample_indices(batch_size))
+
+    #importance-sampling weights of the sampled transitions
+    def weights(self, indices):
+        return np.ones(len(indices))
+
+    def update_priorities(self, indices, td_errors):
+        pass
+
+#Binary tree in an array: the leaves (from capacity to 2*capacity) are the priorities
+#and every node is the sum of its two children, so tree[1] is the total.
+class SumTree():
+    def __init__(self, size):
+        self.capacity = 1
+        while self.capacity < size:
+            self.capacity *= 2
+        self.tree = np.zeros(2*self.capacity)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices)+self.capacity]
+
+    #O(log n) for each index, the nodes of a level are updated together
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices)+self.capacity
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes//2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2*nodes]+self.tree[2*nodes+1]
+            nodes = np.unique(nodes//2)
+
+    #index of the leaf where the cumulative sum of the priorities reaches each value
+    def find(self, values):
+        values = np.array(values, dtype=float)
+        nodes = np.ones(values.size, dtype=int)
+        while nodes[0] < self.capacity:
+            left = 2*nodes
+            right = values > self.tree[left]
+            values -= self.tree[left]*right
+            nodes = left+right
+        return nodes-self.capacity
+
+#Prioritized replay: a transition is sampled with probability p_i^alpha/sum(p^alpha), p_i = |td_error_i|+epsilon.
+#The new transitions have the max priority seen, the sampling is stratified
+#in batch_size segments of the total and beta is the exponent of the importance-sampling weights.
+class PrioritizedReplayMemory(ReplayMemory):
+    def __init__(self, size, filename = None, alpha = 0.6, beta = 0.4, epsilon = 1e-6):
+        ReplayMemory.__init__(self, size, filename)
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(size)
+
+    def append(self, state, action, reward, next_state, done):
+        self.tree.update([self.cursor], [self.max_priority**self.alpha])
+        ReplayMemory.append(self, state, action, reward, next_state, done)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        positions = ReplayMemory.extend(self, states, actions, rewards, next_states, dones)
+        self.tree.update(positions, self.max_priority**self.alpha*np.ones(positions.size))
+        return positions
+
+    def sample_indices(self, batch_size):
+        segment = self.tree.total()/batch_size
+        values = (np.arange(batch_size)+np.random.rand(batch_size))*segment
+        return np.minimum(self.tree.find(values), self.count-1)
+
+    def weights(self, indices):
+        probabilities = self.tree.get(indices)/self.tree.total()
+        weights = (self.count*probabilities)**-self.beta
+        return weights/np.max(weights)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors)+self.epsilon
+        self.max_priority = max(self.max_priority, np.max(priorities))
+        self.tree.update(indices, priorities**self.alpha)
@@ -2,34 +2,172 @@ import numpy as np
 from genericlayer import GenericLayer
 from utils import define_weights
 
+#max number of weights converted to int32 at time by the compact kernels
+CHUNK_ELEMENTS = 2**22
+
+#states +1/-1 packed in bits along the last axis
+def pack(X):
+    return np.packbits(np.asarray(X) > 0, axis=-1)
+
+def unpack(B, state_size):
+    return np.unpackbits(B, axis=-1)[..., :state_size].astype(np.int8)*2-1
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int32)
+
+#Hamming distances (probes, patterns) of the packed probes P and patterns B,
+#accumulated one byte column at time: no (probes, patterns, bytes) temporary
+def hamming(P, B):
+    distances = np.zeros([P.shape[0], B.shape[0]], dtype=np.int32)
+    for j in range(B.shape[1]):
+        distances += POPCOUNT[np.bitwise_xor(P[:,j,np.newaxis], B[np.newaxis,:,j])]
+    return distances
+
 class Hopfield(GenericLayer):
-    def __init__(self, state_size):
+    def __init__(self, state_size, mode = 'sequential', max_sweeps = 100, rule = 'hebbian', weights_dtype = None, index_radius = None):
         self.state_size = state_size
-        self.W = define_weights('zeros', state_size, state_size)
+        #index_radius: a probe within this Hamming distance from a stored pattern that is a fixed point
+        #returns the pattern without running the dynamics, None to disable the index
+        self.index_radius = index_radius
+        self.index_bits = np.zeros([0, (state_size+7)//8], dtype=np.uint8)
+        self.index_fixed = None
+        #rule: 'hebbian', 'pseudo-inverse' or 'storkey' learning rule of store
+        self.rule = rule
+        #weights_dtype: None for float weights, np.int8 or np.int16 for the compact hebbian network
+        #where the states are int and the kernels convert chunks of weights to int32
+        self.weights_dtype = weights_dtype
+        if weights_dtype is None:
+            self.W = define_weights('zeros', state_size, state_size)
+            self.state_dtype = float
+        elif rule == 'hebbian':
+            self.W = np.zeros([state_size, state_size], dtype=weights_dtype)
+            self.state_dtype = np.int32
+        else:
+            raise Exception('Type not correct!')
+        self.patterns = np.zeros([0, state_size])
+        #mode: 'sequential' visits the units in order, 'random' in a new random order every sweep
+        self.mode = mode
+        self.max_sweeps = max_sweeps
+
+    #E = -1/2*x.W.x, with the local field h = W.x flipping x_i to -x_i changes the energy of
+    #dE_i = 2*x_i*h_i-2*W_ii, a unit is flipped when it is against its field and dE_i < 0
+    def unstable(self, x, h, diag):
+        xh = x*h
+        return (xh < 0) & (xh < diag)
+
+    def chunks(self):
+        step = max(1, CHUNK_ELEMENTS//self.state_size)
+        return [slice(a, min(a+step, self.state_size)) for a in range(0, self.state_size, step)]
+
+    #W is symmetric, so the local field of the rows of X is X.W
+    def local_field(self, X):
+        if self.weights_dtype is None:
+            return X.dot(self.W)
+        H = np.zeros(X.shape, dtype=np.int32)
+        for rows in self.chunks():
+            H[..., rows] = X.dot(self.W[rows].astype(np.int32).T)
+        return H
+
+    def weight_row(self, i):
+        if self.weights_dtype is None:
+            return self.W[i]
+        return self.W[i].astype(np.int32)
+
+    def fixed_patterns(self):
+        if self.index_fixed is None:
+            P = unpack(self.index_bits, self.state_size).astype(self.state_dtype)
+            self.index_fixed = ~np.any(self.unstable(P, self.local_field(P), np.diag(self.W)), 1)
+        return self.index_fixed
+
+    #index of the nearest stored pattern of each probe if it is a fixed point within index_radius, -1 otherwise
+    def lookup(self, X):
+        X = np.atleast_2d(X)
+        if self.index_radius is None or self.index_bits.shape[0] == 0:
+            return -np.ones(X.shape[0], dtype=int)
+        distances = hamming(pack(X), self.index_bits)
+        nearest = np.argmin(distances, 1)
+        found = (distances[np.arange(X.shape[0]), nearest] <= self.index_radius) & self.fixed_patterns()[nearest]
+        return np.where(found, nearest, -1)
 
     def forward(self, x, update = False):
-        y = np.sign(self.W.dot(x))
-        diff = y!=x
-        while sum(diff):
-            min_energy = -1/2*x.dot(self.W).dot(x)
-            min_energy_ind = None
-            for i,changed in enumerate(diff):
-                if changed:
-                    x_aux = x.copy()
-                    x_aux[i] = y[i]
-                    min_energy_aux = -1/2*x_aux.dot(self.W).dot(x_aux)
-                    if min_energy_aux < min_energy:
-                        min_energy_ind = i
-
-            if min_energy_ind != None:
-                x[min_energy_ind] = y[min_energy_ind]
-            else:
-                x = y
-
-            y = np.sign(self.W.dot(x))
-            diff = y!=x
-
-        return y
+        x = np.array(x, dtype=self.state_dtype)
+        if x.ndim == 2:
+            return self.forward_batch(x)
+        nearest = self.lookup(x)[0]
+        if nearest >= 0:
+            return unpack(self.index_bits[nearest], self.state_size).astype(self.state_dtype)
+        h = self.local_field(x)
+        diag = np.diag(self.W)
+        for sweep in range(self.max_sweeps):
+            order = np.random.permutation(self.state_size) if self.mode == 'random' else np.arange(self.state_size)
+            flips = 0
+            pos = 0
+            while pos < self.state_size:
+                candidates = np.flatnonzero(self.unstable(x[order[pos:]], h[order[pos:]], diag[order[pos:]]))
+                if candidates.size == 0:
+                    break
+                pos += candidates[0]
+                i = order[pos]
+                x[i] = -x[i]
+                h += 2*x[i]*self.weight_row(i)
+                flips += 1
+                pos += 1
+            if flips == 0:
+                break
+        return x
+
+    #many probes (batch, state_size) advanced together, unit by unit,
+    #a probe is not visited anymore after a sweep without flips
+    def forward_batch(self, X):
+        X = np.array(X, dtype=self.state_dtype)
+        nearest = self.lookup(X)
+        found = nearest >= 0
+        X[found] = unpack(self.index_bits[nearest[found]], self.state_size)
+        active = np.flatnonzero(~found)
+        H = np.zeros(X.shape, dtype=np.result_type(X, self.W))
+        H[active] = self.local_field(X[active])
+        diag = np.diag(self.W)
+        for sweep in range(self.max_sweeps):
+            order = np.random.permutation(self.state_size) if self.mode == 'random' else np.arange(self.state_size)
+            flipped = np.zeros(active.size, dtype=bool)
+            for i in order:
+                xh = X[active, i]*H[active, i]
+                changed = (xh < 0) & (xh < diag[i])
+                if changed.any():
+                    rows = active[changed]
+                    X[rows, i] = -X[rows, i]
+                    H[rows] += 2*X[rows, i][:,np.newaxis]*self.weight_row(i)
+                    flipped |= changed
+            active = active[flipped]
+            if active.size == 0:
+                break
+        return X
+
+    def forward_packed(self, B):
+        return pack(self.forward(unpack(B, self.state_size)))
 
+    #x: one pattern or a matrix of patterns (patterns_num, state_size)
     def store(self, x):
-        self.W += x.reshape([self.state_size,1]).dot(x.reshape([self.state_size,1]).T)-np.eye(self.state_size,self.state_size)
+        P = np.array(x, dtype=float).reshape(-1, self.state_size)
+        self.index_bits = np.vstack([self.index_bits, pack(P)])
+        self.index_fixed = None
+        if self.rule == 'hebbian' and self.weights_dtype is not None:
+            P = P.astype(np.int32)
+            limits = np.iinfo(self.weights_dtype)
+            for rows in self.chunks():
+                block = self.W[rows].astype(np.int32)+P[:, rows].T.dot(P)
+                block[np.arange(rows.stop-rows.start), np.arange(rows.start, rows.stop)] -= P.shape[0]
+                self.W[rows] = np.clip(block, limits.min, limits.max)
+        elif self.rule == 'hebbian':
+            self.W += P.T.dot(P)-P.shape[0]*np.eye(self.state_size,self.state_size)
+        elif self.rule == 'pseudo-inverse':
+            self.patterns = np.vstack([self.patterns, P])
+            self.W = self.patterns.T.dot(np.linalg.pinv(self.patterns.dot(self.patterns.T))).dot(self.patterns)
+        elif self.rule == 'storkey':
+            for p in P:
+                h = self.W.dot(p)
+                #local field of i without the units i and j
+                H = h[:,np.newaxis]-(np.diag(self.W)*p)[:,np.newaxis]-self.W*p[np.newaxis,:]
+                self.W += (np.outer(p,p)-p[:,np.newaxis]*H.T-H*p[np.newaxis,:])/self.state_size
+                np.fill_diagonal(self.W, 0.0)
+        else:
+            raise Exception('Type not correct!')
@@ -1,9 +1,17 @@
+import multiprocessing
 import numpy as np
 from genericlayer import GenericLayer
 import utils
 
+#over this number of units the grid distances are computed when needed instead of being stored in a table
+GRID_TABLE_MAX_UNITS = 4096
+
 
 class Kohonen(GenericLayer):
+    #table of the grid distances between the units, None for big maps
+    #(class attribute also for the models saved before it was added)
+    grid_distances = None
+
     def __init__(self, input_size, output_size, topology, output_type = 'btu', weights = 'random', learning_rate = 0.1, radius = 0.1):
         self.input_size = input_size
         self.output_size = output_size
@@ -29,27 +37,176 @@ class Kohonen(GenericLayer):
             raise Exception('Type not correct!')
 
         self.learning_rate = learning_rate
-        self.W = utils.define_weights(weights, input_size, output_size)
+        if isinstance(weights, np.memmap):
+            self.W = weights
+        else:
+            self.W = utils.define_weights(weights, input_size, output_size).reshape(output_size, input_size)
+        #grid distances computed from the positions until the table is ready
+        self.grid_distances = None
+        if output_size <= GRID_TABLE_MAX_UNITS:
+            self.grid_distances = self.grid_distance_table()
+        #chunk_size: max number of samples and of units processed together, None for no chunks
+        self.chunk_size = None
+        self.search_index = None
         self.btu = None
         self.weight_distance = None
         self.selected_weight = None
 
+    #distance on the topology grid between all the couples of units
+    def grid_distance_table(self):
+        return self.grid_distance_rows(np.arange(len(self.positions)))
+
+    def grid_distance_rows(self, rows, units = slice(None)):
+        if self.grid_distances is not None:
+            return self.grid_distances[rows][:, units]
+        positions = np.array(self.positions, dtype=float).reshape(len(self.positions), -1)
+        diff = np.abs(positions[rows][:, np.newaxis, :]-positions[units][np.newaxis, :, :])
+        if self.topology_close:
+            diff = np.minimum(diff, np.array(self.topology, dtype=float)-diff)
+        return np.sqrt(np.sum(diff**2, 2))
+
+    def memmap_weights(self, filename, mode = 'w+'):
+        W = np.memmap(filename, dtype=float, mode=mode, shape=(self.output_size, self.input_size))
+        if mode == 'w+':
+            for units in self.chunks(self.output_size):
+                W[units] = self.W[units]
+        self.W = W
+
+    def chunks(self, size):
+        step = size if self.chunk_size is None else self.chunk_size
+        return [slice(a, min(a+step, size)) for a in range(0, size, step)]
+
+    #index: an approximate search index of kohonenindex, None for the exact search
+    def set_search_index(self, index):
+        self.search_index = index
+        if index is not None:
+            index.build(self)
+
+    def weights_updated(self):
+        if self.search_index is not None:
+            self.search_index.updated(self)
+
     def best_matching_unit(self, x):
-        return np.argmin(np.sum((np.array(self.W)-x)**2,1))
+        if self.search_index is not None:
+            return self.search_index.query(self, x)[0]
+        if self.chunk_size is not None:
+            return self.exact_best_matching_units(np.array([x]))[0]
+        return np.argmin(np.sum((self.W-x)**2,1))
+
+    def best_matching_units(self, X):
+        if self.search_index is not None:
+            return self.search_index.query(self, X)
+        return self.exact_best_matching_units(X)
+
+    #||x-w||^2 = ||x||^2-2*x.w+||w||^2, ||x||^2 is the same for all the units of a sample
+    def exact_best_matching_units(self, X):
+        if self.chunk_size is None:
+            return np.argmin(np.sum(self.W**2,1)-2*X.dot(self.W.T),1)
+        bmus = np.zeros(X.shape[0], dtype=int)
+        for rows in self.chunks(X.shape[0]):
+            x = np.asarray(X[rows], dtype=float)
+            best = np.inf*np.ones(x.shape[0])
+            for units in self.chunks(self.output_size):
+                W = np.asarray(self.W[units])
+                d = np.sum(W**2,1)-2*x.dot(W.T)
+                ind = np.argmin(d,1)
+                value = d[np.arange(x.shape[0]), ind]
+                better = value < best
+                best[better] = value[better]
+                bmus[rows][better] = ind[better]+units.start
+        return bmus
 
     def phi(self, d):
         return np.maximum(1.0-((d**2.0)/(self.radius**2.0)),0.0)
 
     def distance(self, best_matching_unit):
-        if self.topology_close:
-            return np.sqrt(np.sum(np.min([np.abs(np.array(self.positions)-self.positions[best_matching_unit]),self.topology - np.abs(np.array(self.positions)-self.positions[best_matching_unit])],0)**2,1))
-        else:
-            return np.sqrt(np.sum((np.array(self.positions)-self.positions[best_matching_unit])**2,1))
+        return self.grid_distance_rows(np.array([best_matching_unit]))[0]
 
     def forward(self, x, update = False):
         self.btu = self.best_matching_unit(x)
         self.weight_distance = self.distance(self.btu)
         if update:
-            self.W += self.learning_rate*np.array([self.phi(self.weight_distance)]).T*(np.array([x]).repeat(self.output_size,0)-self.W)
+            self.W += self.learning_rate*self.phi(self.weight_distance)[:,np.newaxis]*(x-self.W)
+            self.weights_updated()
         self.selected_weight = self.W[self.btu,:]
-        return self.output_type()
\ No newline at end of file
+        return self.output_type()
+
+    #batch-SOM: each unit moves towards the mean of the batch weighted with the neighbourhood function
+    #learning_rate = 1 gives the classic batch-SOM update W = sum(phi*x)/sum(phi)
+    #numerator = sum(phi*x) and denominator = sum(phi) are computed in chunks of samples and units
+    def batch_statistics(self, X, bmus, units = slice(None)):
+        units = slice(*units.indices(self.output_size))
+        numerator = np.zeros((units.stop-units.start, self.input_size))
+        denominator = np.zeros(units.stop-units.start)
+        for rows in self.chunks(X.shape[0]):
+            x = np.asarray(X[rows], dtype=float)
+            h = self.phi(self.grid_distance_rows(bmus[rows], units))
+            numerator += h.T.dot(x)
+            denominator += np.sum(h,0)
+        return numerator, denominator
+
+    def apply_statistics(self, numerator, denominator, units = slice(None)):
+        W = self.W[units]
+        changed = denominator > 0
+        W[changed] += self.learning_rate*(numerator[changed]/denominator[changed][:,np.newaxis]-W[changed])
+
+    def batch_update(self, X):
+        bmus = self.best_matching_units(X)
+        for units in self.chunks(self.output_size):
+            numerator, denominator = self.batch_statistics(X, bmus, units)
+            self.apply_statistics(numerator, denominator, units)
+        self.weights_updated()
+        return bmus
+
+    #map-reduce of the batch-SOM statistics: every process computes numerator and denominator
+    #of a shard of the batch and they are summed before the update.
+    #The processes are forked, so memmap data and a memmap codebook are shared and not copied.
+    def sharded_batch_update(self, pool, data, indices, processes):
+        W = None if isinstance(self.W, np.memmap) else self.W
+        shards = [(shard, W, self.radius) for shard in np.array_split(indices, processes) if shard.size > 0]
+        statistics = pool.map(_sharded_statistics, shards)
+        self.apply_statistics(np.sum([shard[0] for shard in statistics],0), np.sum([shard[1] for shard in statistics],0))
+        self.weights_updated()
+
+    #learning_rate and radius are (start, stop) and decay linearly along the epochs
+    #data can be a np.memmap, only one batch at time is loaded in memory
+    def train(self, data, epochs, batch_size = 100, learning_rate = None, radius = None, processes = None):
+        global _sharded
+        data = data if isinstance(data, np.ndarray) else np.asarray(data, dtype=float)
+        learning_rate = (self.learning_rate, self.learning_rate) if learning_rate is None else learning_rate
+        radius = (self.radius, self.radius) if radius is None else radius
+        pool = None
+        if processes is not None and processes > 1:
+            _sharded = (self, data)
+            pool = multiprocessing.Pool(processes)
+        try:
+            for epoch in range(epochs):
+                ratio = float(epoch)/max(epochs-1, 1)
+                self.learning_rate = learning_rate[0]+(learning_rate[1]-learning_rate[0])*ratio
+                self.radius = radius[0]+(radius[1]-radius[0])*ratio
+                order = np.random.permutation(data.shape[0])
+                for a in range(0, data.shape[0], batch_size):
+                    indices = np.sort(order[a:a+batch_size])
+                    if pool is None:
+                        self.batch_update(np.asarray(data[indices], dtype=float))
+                    else:
+                        self.sharded_batch_update(pool, data, indices, processes)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+                _sharded = None
+
+    def map_data(self, data):
+        return np.hstack([self.best_matching_units(np.asarray(data[rows], dtype=float)) for rows in self.chunks(data.shape[0])])
+
+_sharded = None
+
+def _sharded_statistics(args):
+    indices, W, radius = args
+    model, data = _sharded
+    model.radius = radius
+    if W is not None:
+        model.W = W
+    X = np.asarray(data[indices], dtype=float)
+    return model.batch_statistics(X, model.best_matching_units(X))
@@ -0,0 +1,112 @@
+import numpy as np
+
+#Approximate best matching unit search for large Kohonen maps.
+#An index is attached with Kohonen.set_search_index, it is built on the codebook W
+#and it is notified with updated() every time the codebook changes.
+
+class SearchIndex(object):
+    def __init__(self, rebuild_every = 1):
+        self.rebuild_every = rebuild_every
+        self.updates = 0
+
+    def build(self, model):
+        self.updates = 0
+
+    def updated(self, model):
+        self.updates += 1
+        if self.rebuild_every is not None and self.updates >= self.rebuild_every:
+            self.build(model)
+
+    def query(self, model, X):
+        raise Exception('Not Implemented!')
+
+    #recall: fraction of samples with the exact best matching unit
+    #distance_error: mean relative increase of the quantization error
+    def recall(self, model, X):
+        X = np.atleast_2d(X)
+        approx = self.query(model, X)
+        exact = model.exact_best_matching_units(X)
+        approx_distance = np.sum((X-model.W[approx])**2,1)
+        exact_distance = np.sum((X-model.W[exact])**2,1)
+        return {
+            'recall': np.mean(approx == exact),
+            'distance_error': np.mean((approx_distance-exact_distance)/np.maximum(exact_distance, 1e-12)),
+        }
+
+#k-means coarse quantizer over W: the query is compared with the centroids and
+#the exact search is done only on the units of the n_probe nearest clusters.
+#The clusters left without units by k-means are not probed.
+class CoarseQuantizerIndex(SearchIndex):
+    def __init__(self, clusters, n_probe = 2, iterations = 10, rebuild_every = 1000):
+        super(CoarseQuantizerIndex, self).__init__(rebuild_every)
+        self.clusters = clusters
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.centroids = None
+        self.members = []
+
+    def build(self, model):
+        super(CoarseQuantizerIndex, self).build(model)
+        W = np.asarray(model.W)
+        clusters = min(self.clusters, W.shape[0])
+        if self.centroids is None or self.centroids.shape[0] != clusters:
+            self.centroids = W[np.random.choice(W.shape[0], clusters, replace=False)].copy()
+        for i in range(self.iterations):
+            assignment = np.argmin(np.sum(self.centroids**2,1)-2*W.dot(self.centroids.T),1)
+            counts = np.bincount(assignment, minlength=clusters)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, W)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled]/counts[filled][:,np.newaxis]
+        assignment = np.argmin(np.sum(self.centroids**2,1)-2*W.dot(self.centroids.T),1)
+        self.members = [np.flatnonzero(assignment == c) for c in range(clusters)]
+
+    def query(self, model, X):
+        if self.centroids is None:
+            self.build(model)
+        X = np.atleast_2d(X)
+        filled = np.flatnonzero([members.size > 0 for members in self.members])
+        centroids = self.centroids[filled]
+        n_probe = min(self.n_probe, filled.size)
+        probes = filled[np.argsort(np.sum(centroids**2,1)-2*X.dot(centroids.T),1)[:,:n_probe]]
+        bmus = np.zeros(X.shape[0], dtype=int)
+        for i, x in enumerate(X):
+            candidates = np.concatenate([self.members[c] for c in probes[i]])
+            bmus[i] = candidates[np.argmin(np.sum(model.W[candidates]**2,1)-2*model.W[candidates].dot(x))]
+        return bmus
+
+#greedy descent on the topology grid starting from the previous best matching unit,
+#it moves to the best grid neighbour while the distance decreases
+class GridLocalSearch(SearchIndex):
+    def __init__(self, neighbourhood = 1.5):
+        super(GridLocalSearch, self).__init__(None)
+        self.neighbourhood = neighbourhood
+        self.neighbours = None
+        self.last = 0
+
+    def build(self, model):
+        super(GridLocalSearch, self).build(model)
+        self.neighbours = []
+        for units in model.chunks(model.output_size):
+            rows = model.grid_distance_rows(np.arange(units.start, units.stop))
+            self.neighbours += [np.flatnonzero((row > 0) & (row <= self.neighbourhood)) for row in rows]
+
+    def query(self, model, X):
+        if self.neighbours is None:
+            self.build(model)
+        X = np.atleast_2d(X)
+        bmus = np.zeros(X.shape[0], dtype=int)
+        for i, x in enumerate(X):
+            current = self.last
+            current_distance = np.sum((model.W[current]-x)**2)
+            while True:
+                neighbours = self.neighbours[current]
+                distances = np.sum((model.W[neighbours]-x)**2,1)
+                best = np.argmin(distances)
+                if distances[best] >= current_distance:
+                    break
+                current = neighbours[best]
+                current_distance = distances[best]
+            bmus[i] = current
+            self.last = current
+        return bmus
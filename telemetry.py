@@ -0,0 +1,112 @@
+import numpy as np
+
+#Per-batch training telemetry for Trainer(telemetry = Telemetry(...)).
+#Every minibatch (every window of the training through time) is a record of a preallocated ring buffer with the loss, the samples per second
+#and the time spent in data (from the end of the previous batch), forward (with the loss),
+#backward and update of the optimizer. callback(record) is called for every record and every
+#flush_every records the new ones are appended to filename: a .csv file or, for .npy,
+#a file <filename without .npy>_<flush number>.npy for each flush.
+
+RECORD = np.dtype([
+    ('time', 'f8'),
+    ('epoch', 'i4'),
+    ('batch', 'i8'),
+    ('samples', 'i4'),
+    ('loss', 'f8'),
+    ('dJdy', 'f8'),
+    ('data_time', 'f8'),
+    ('forward_time', 'f8'),
+    ('backward_time', 'f8'),
+    ('update_time', 'f8'),
+    ('batch_time', 'f8'),
+    ('samples_per_second', 'f8'),
+])
+
+PHASES = ['data_time', 'forward_time', 'backward_time', 'update_time', 'batch_time']
+
+class Telemetry():
+    def __init__(self, size = 10000, filename = None, flush_every = 1000, callback = None):
+        if flush_every > size:
+            raise Exception('flush_every bigger than size!')
+        self.records = np.zeros(size, dtype=RECORD)
+        self.filename = filename
+        self.flush_every = flush_every
+        self.callback = callback
+        self.count = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.epoch = 0
+        self.last_end = None
+
+    def __len__(self):
+        return min(self.count, self.records.size)
+
+    def start_epoch(self, epoch):
+        self.epoch = epoch
+
+    def record(self, samples, loss, dJdy, start, forward_time, backward_time, update_time, end):
+        record = self.records[self.count % self.records.size]
+        record['time'] = end
+        record['epoch'] = self.epoch
+        record['batch'] = self.count
+        record['samples'] = samples
+        record['loss'] = loss
+        record['dJdy'] = dJdy
+        record['data_time'] = start-self.last_end if self.last_end is not None else 0.0
+        record['forward_time'] = forward_time
+        record['backward_time'] = backward_time
+        record['update_time'] = update_time
+        record['batch_time'] = end-start
+        record['samples_per_second'] = samples/max(end-start, 1e-12)
+        self.last_end = end
+        self.count += 1
+        if self.callback is not None:
+            self.callback(record)
+        if self.filename is not None and self.count-self.flushed >= self.flush_every:
+            self.flush()
+
+    #records in the buffer, from the oldest
+    def history(self):
+        if self.count <= self.records.size:
+            return self.records[:self.count]
+        cursor = self.count % self.records.size
+        return np.concatenate([self.records[cursor:], self.records[:cursor]])
+
+    #without filename the records are only in the buffer
+    def flush(self):
+        if self.filename is None:
+            return
+        if self.count > self.flushed:
+            new = self.history()[-(self.count-self.flushed):]
+            if self.filename.endswith('.npy'):
+                np.save('%s_%06d.npy' % (self.filename[:-4], self.flushes), new)
+            else:
+                f = open(self.filename, 'a')
+                if self.flushes == 0:
+                    f.write(','.join(RECORD.names)+'\n')
+                np.savetxt(f, np.array(new.tolist()), delimiter=',', fmt='%.9g')
+                f.close()
+            self.flushes += 1
+        self.flushed = self.count
+
+    #mean throughput and percentiles of the time of the phases on the records in the buffer
+    def summary(self, percentiles = (50, 90, 99)):
+        records = self.history()
+        if records.size == 0:
+            return {}
+        summary = {
+            'batches': self.count,
+            'samples_per_second': np.sum(records['samples'])/max(np.sum(records['batch_time']+records['data_time']), 1e-12),
+            'loss': np.mean(records['loss']),
+        }
+        for phase in PHASES:
+            for p, value in zip(percentiles, np.percentile(records[phase], percentiles)):
+                summary[phase+'_p'+str(p)] = value
+        return summary
+
+def format_summary(summary):
+    lines = ['batches: %d  samples/s: %.1f  loss: %.6g' % (summary['batches'], summary['samples_per_second'], summary['loss'])]
+    for phase in PHASES:
+        values = sorted([(int(key[len(phase)+2:]), summary[key]) for key in summary if key.startswith(phase+'_p')])
+        lines.append('%-14s ' % phase + '  '.join(['p%d %.3e' % (p, value) for p, value in values]))
+    return '\n'.join(lines)
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_almost_equal
+
+from actorlearner import ActorLearner, eps_greedy_actions
+from qlearning import DeepAgent
+from network import Sequential, Parallel
+from layers import LinearLayer, TanhLayer
+from losses import SquaredLoss
+from optimizers import GradientDescent
+from trainer import Trainer
+
+#n points on a line moved by the commands, an episode ends out of [-1,1]
+class LineBatch():
+    def __init__(self, n):
+        self.p = np.zeros([n, 1])
+
+    def observation(self):
+        return self.p.copy()
+
+    def step(self, dt, commands):
+        self.p[:,0] += dt*commands
+        done = np.abs(self.p[:,0]) > 1
+        reward = np.where(done, -1.0, 0.0)
+        observation = self.observation()
+        self.p[done] = 0.0
+        return observation, reward, done
+
+class ActorLearnerTests(unittest.TestCase):
+    def test_eps_greedy_actions(self):
+        Q_out = np.array([[0.0, 1.0], [2.0, 1.0]])
+        assert_array_equal(eps_greedy_actions(Q_out, 0.0), [1, 0])
+        self.assertTrue(set(eps_greedy_actions(np.zeros([1000, 3]), 1.0)) == set([0, 1, 2]))
+
+    def test_forward_all(self):
+        observations = np.random.rand(5, 2)
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        expected = np.array([Q.forward(observation) for observation in observations])
+        assert_almost_equal(ActorLearner(DeepAgent(Q, None, 10), None, [1.0]).forward_all(observations), expected)
+        #a model without batches is forwarded one observation at a time
+        Q = Sequential(LinearLayer(2,4), Parallel(LinearLayer(4,3), LinearLayer(4,3)))
+        expected = np.array([Q.forward(observation) for observation in observations])
+        self.assertFalse(Q.accepts_batch())
+        assert_almost_equal(ActorLearner(DeepAgent(Q, None, 10), None, [1.0]).forward_all(observations), expected)
+
+    def test_run(self):
+        Q = Sequential(LinearLayer(1,4), TanhLayer, LinearLayer(4,2))
+        agent = DeepAgent(Q, Q, 1000, minibatch_size=16, batched=True)
+        agent.set_training_options(Trainer(), SquaredLoss(), GradientDescent(learning_rate=0.01))
+        pipeline = ActorLearner(agent, lambda: LineBatch(8), [1.0, -1.0], actors=2, time_step=0.5, chunk_size=16, sync_every=5)
+        W = Q.elements[0].W.get().copy()
+        report = pipeline.run(steps=20)
+        self.assertEqual(report['updates'], 20)
+        self.assertTrue(report['transitions'] >= 16)
+        self.assertEqual(len(agent.D), min(report['transitions'], 1000))
+        self.assertEqual(pipeline.version.value, 5)
+        self.assertFalse(np.allclose(W, Q.elements[0].W.get()))
@@ -0,0 +1,28 @@
+import unittest
+import Queue
+
+from asyncprinters import consume
+
+class AsyncPrintersTests(unittest.TestCase):
+    def test_consume(self):
+        queue = Queue.Queue()
+        queue.put((0, 4.0, 1.0, 5.0, [1.0, 2.0]))
+        queue.put((1, 3.0, 0.5, None, None))
+        queue.put((2, 2.0, 0.25, 6.0, [3.0, 0.5]))
+        queue.put(None)
+        draws = []
+        def draw(history, limits):
+            draws.append((list(history['epoch']), [list(limit) for limit in limits]))
+        history = consume(queue, 10.0, draw)
+        self.assertEqual(history['epoch'], [0, 1, 2])
+        self.assertEqual(history['train'], [4.0, 3.0, 2.0])
+        self.assertEqual(history['test'], [5.0, None, 6.0])
+        #the weights norms are not sent at every epoch
+        self.assertEqual(history['weights_epoch'], [0, 2])
+        self.assertEqual(history['weights'], [[1.0, 2.0], [3.0, 0.5]])
+        #one draw for the first point, the others are rate limited until the end
+        self.assertEqual([epochs for epochs, limits in draws], [[0], [0, 1, 2]])
+        self.assertEqual(draws[-1][1], [[2.0, 6.0], [0.25, 1.0], [0.5, 3.0]])
+
+if __name__ == '__main__':
+    unittest.main()
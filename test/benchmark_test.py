@@ -0,0 +1,38 @@
+import unittest
+
+from benchmark import Benchmark, compare, format_report
+
+class BenchmarkTests(unittest.TestCase):
+    def test_compare(self):
+        base = {
+            'layers.A/10/1': {'forward': 1e-3, 'backward': 1e-3, 'update': 0.0},
+            'layers.B/10/1': {'forward': 1e-3},
+            'layers.C/10/1': {'forward': 1e-6},
+            'layers.D/10/1': {'forward': 1e-3},
+        }
+        head = {
+            'layers.A/10/1': {'forward': 2e-3, 'backward': 0.5e-3, 'update': 0.0},
+            'layers.B/10/1': {'forward': 1.05e-3},
+            'layers.C/10/1': {'forward': 5e-6},
+        }
+        report = compare(base, head, threshold=0.1, min_time=1e-5)
+        #the update of A and C are below min_time, D is not in head
+        self.assertEqual([(case, phase, status) for case, phase, base_time, head_time, ratio, status in report], [
+            ('layers.A/10/1', 'backward', 'improvement'),
+            ('layers.A/10/1', 'forward', 'REGRESSION'),
+            ('layers.B/10/1', 'forward', ''),
+        ])
+        self.assertAlmostEqual(report[1][4], 2.0)
+        lines = format_report(report).split('\n')
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[2].endswith('REGRESSION'))
+        self.assertFalse('inf' in format_report(report))
+
+    def test_run(self):
+        results = Benchmark(sizes=[5], batch_sizes=[2], repeat=1).run()
+        self.assertTrue('layers.VariableDictLayer/5/2' in results)
+        self.assertTrue('optimizers.AdaGrad/5/2' in results)
+        self.assertEqual(sorted(results['layers.LinearLayer/5/2']), ['backward', 'forward', 'update'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ from layers import ComputationalGraphLayer, VariableDictLayer
 
 from layers import  SigmoidLayer, LinearLayer
 from network import  Sequential
+from standart_network.vanilla import VanillaNet
 
 def sigmoid(x):
     return 1.0/(1.0+np.exp(-x))
@@ -348,3 +349,19 @@ class ComputationGraphTests(unittest.TestCase):
     #     xyv = [xv,yv]
     #     net = ComputationalGraphLayer(Sigmoid(W*HStack(x,y)+b))
 
+
+    def test_summary(self):
+        x = Input(['x','h'],'x')
+        h = Input(['x','h'],'h')
+        net = ComputationalGraphLayer(Sigmoid(MWeight(2,3).dot(x)+MWeight(3,3).dot(h)))
+        rows = net.summary([(2,),(3,)], batch_size=2)
+        self.assertEqual(rows[0]['output_shape'], (3,))
+        self.assertEqual(sum([row['params'] for row in rows]), 6+9)
+        self.assertEqual(sum([row['forward_macs'] for row in rows]), 2*(6+9))
+
+        rnn = VanillaNet(2, 2, 3)
+        rows = rnn.summary(2, window_size=3)
+        self.assertEqual(sum([row['params'] for row in rows]), 6+9+6+3+2)
+        self.assertEqual(sum([row['forward_macs'] for row in rows]), 3*(6+9+6))
+        self.assertEqual(len([row for row in rows if row['path'].startswith('VanillaNet.nodes[2].') and row['calls'] > 0]), len([row for row in rows if row['path'].startswith('VanillaNet.net.')]))
+        self.assertEqual(rnn.nodes, [])
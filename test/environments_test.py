@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+from example.cart_and_ball import cart_and_ball_dyn
+from example.space import space
+
+class CartAndBallBatchTests(unittest.TestCase):
+    def test_same_dynamics(self):
+        np.random.seed(1)
+        n = 8
+        balls = [cart_and_ball_dyn.Ball() for i in range(n)]
+        carts = [cart_and_ball_dyn.Cart() for i in range(n)]
+        worlds = cart_and_ball_dyn.CartAndBallBatch(n, max_catches=1000)
+        worlds.ball_p[...] = [ball.p for ball in balls]
+        worlds.ball_v[...] = [ball.v for ball in balls]
+        worlds.cart_p[...] = [cart.p for cart in carts]
+        running = np.ones(n, dtype=bool)
+        catches = 0
+        for step in range(300):
+            command_x = cart_and_ball_dyn.commands[np.random.randint(0, 3, n)]
+            for ball, cart, command in zip(balls, carts, command_x):
+                cart.step(0.01, command)
+                ball.step(0.01, cart)
+            observation, reward, done = worlds.step(0.01, command_x)
+            assert_almost_equal(observation[running], np.array([[ball.p[0], cart.p[0]] for ball, cart in zip(balls, carts)])[running])
+            assert_array_equal(worlds.catch[running], np.array([ball.catch for ball in balls], dtype=bool)[running])
+            catches += np.sum(worlds.catch[running])
+            assert_array_equal(done[running], np.array([ball.lose for ball in balls], dtype=bool)[running])
+            #the worlds restart after the end of the episode
+            running &= ~done
+        self.assertTrue(catches > 0)
+        self.assertTrue(np.any(~running))
+
+class BallBatchTests(unittest.TestCase):
+    def test_same_dynamics(self):
+        np.random.seed(2)
+        n = 8
+        obstacles = [[2.0, 2.0, 0.5], [3.5, 1.0, 0.3]]
+        win = [4.0, 4.0, 0.5]
+        start = np.array([1.0, 1.0])
+        balls = [space.Ball(start.copy()) for i in range(n)]
+        batch = space.BallBatch(n, obstacles, win, start=start, time_limit=np.inf)
+        running = np.ones(n, dtype=bool)
+        for step in range(200):
+            command = space.commands[np.random.randint(0, 4, n)]
+            for ball, ball_command in zip(balls, command):
+                ball.step(0.05, ball_command, obstacles, win)
+            observation, reward, done = batch.step(0.05, command)
+            assert_almost_equal(observation[running], np.array([ball.p for ball in balls])[running])
+            assert_array_equal(batch.lose[running], np.array([ball.lose for ball in balls], dtype=bool)[running])
+            assert_array_equal(batch.win[running], np.array([ball.win for ball in balls], dtype=bool)[running])
+            running &= ~done
+        self.assertFalse(np.all(running))
+
+    def test_time_limit(self):
+        batch = space.BallBatch(2, [], [4.0, 4.0, 0.1], start=np.array([1.0, 1.0]), time_limit=0.35, reward_timeout=-0.5)
+        for step in range(3):
+            observation, reward, done = batch.step(0.1, np.zeros([2, 2]))
+        assert_array_equal(done, [False, False])
+        observation, reward, done = batch.step(0.1, np.zeros([2, 2]))
+        assert_array_equal(done, [True, True])
+        assert_array_equal(reward, [-0.5, -0.5])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from example.cart_and_ball.evaluate import evaluate, greedy_policy, aggregate, format_report
+from qlearning import DeepAgent, BatchAgent, GenericAgent, Agent, AseAce
+from network import Sequential
+from layers import LinearLayer, TanhLayer
+import utils
+
+class EvaluateTests(unittest.TestCase):
+    def test_processes(self):
+        np.random.seed(0)
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = DeepAgent(Q, Q, 100)
+        report = evaluate(agent, 6, processes=1, max_steps=300)
+        self.assertEqual(report['episodes'], 6)
+        self.assertEqual(evaluate(agent, 6, processes=3, max_steps=300), report)
+        self.assertEqual(len(format_report(report).split('\n')), 5)
+
+    def test_batch_agent(self):
+        agent = BatchAgent(2, 3)
+        agent.Q[0, :] = 1.0
+        #ball on the left or on the right of the cart
+        side = lambda observation: int(observation[0] > observation[1])
+        policy = greedy_policy(agent, side)
+        self.assertEqual(policy(np.array([1.0, 2.0])), 0)
+        report = evaluate(agent, 4, processes=2, state_function=side, max_steps=100)
+        self.assertEqual(report, evaluate(agent, 4, processes=1, state_function=side, max_steps=100))
+
+    def test_agents(self):
+        side = lambda observation: int(observation[0] > observation[1])
+        one_hot_side = lambda observation: utils.to_one_hot_vect(side(observation), 2)
+        left, right = np.array([1.0, 2.0]), np.array([2.0, 1.0])
+        agent = Agent(2, 3)
+        agent.Q[2, 1] = 1.0
+        for state_function in [side, one_hot_side]:
+            policy = greedy_policy(agent, state_function)
+            self.assertEqual([policy(left), policy(right)], [0, 2])
+        Q = agent.Q.copy()
+        report = evaluate(agent, 4, processes=2, state_function=side, max_steps=100)
+        self.assertEqual(report, evaluate(agent, 4, processes=1, state_function=side, max_steps=100))
+        assert_array_equal(agent.Q, Q)
+
+        model = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = GenericAgent(model, 3, 5, 1.0)
+        self.assertEqual(greedy_policy(agent)(left), np.argmax(model.forward(left)))
+        report = evaluate(agent, 4, processes=2, max_steps=100)
+        self.assertEqual(report, evaluate(agent, 4, processes=1, max_steps=100))
+        self.assertEqual(agent.count, 0)
+
+        agent = AseAce(2, 0.8)
+        agent.ase.W[...] = [1.0, -1.0]
+        policy = greedy_policy(agent, one_hot_side)
+        self.assertEqual([policy(left), policy(right)], [1, 0])
+        report = evaluate(agent, 4, processes=2, state_function=one_hot_side, commands=[-1.0, 1.0], max_steps=100)
+        self.assertEqual(report, evaluate(agent, 4, processes=1, state_function=one_hot_side, commands=[-1.0, 1.0], max_steps=100))
+        assert_array_equal(agent.ase.W, [1.0, -1.0])
+
+    def test_policy(self):
+        self.assertRaises(Exception, greedy_policy, Sequential(LinearLayer(2,3)))
+        report = evaluate(None, 3, policy=lambda observation: 2, max_steps=50)
+        self.assertEqual(report['episodes'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
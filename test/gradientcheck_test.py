@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_almost_equal
+
+from gradientcheck import check_gradient
+from computationalgraph import Input, MWeight, VWeight, Sigmoid
+from layers import LinearLayer, SigmoidLayer, SoftMaxLayer, ComputationalGraphLayer
+from network import Sequential
+from losses import HuberLoss
+from genericlayer import GenericLayer
+
+class WrongGradientLayer(LinearLayer):
+    def backward(self, dJdy, optimizer = None):
+        return LinearLayer.backward(self, dJdy*1.1, optimizer)
+
+#elementwise loss with a fixed target as a layer, the backward is the product with the loss gradient
+class LossLayer(GenericLayer):
+    def __init__(self, loss, t):
+        self.loss = loss
+        self.t = t
+
+    def forward(self, x, update = False):
+        self.x = x
+        return self.loss.loss(x, self.t)
+
+    def backward(self, dJdy, optimizer = None):
+        return dJdy*self.loss.dJdy_gradient(self.x, self.t)
+
+class GradientCheckTests(unittest.TestCase):
+    def test_sequential(self):
+        model = Sequential(LinearLayer(5,4), SigmoidLayer, LinearLayer(4,3), SoftMaxLayer)
+        report = check_gradient(model, np.random.rand(5))
+        self.assertEqual([row['name'] for row in report], ['input', 'elements[0].W', 'elements[2].W'])
+        self.assertEqual([row['size'] for row in report], [5, 24, 15])
+        self.assertTrue(all([row['passed'] for row in report]))
+
+    def test_directions_and_processes(self):
+        model = Sequential(LinearLayer(30,4), SigmoidLayer, LinearLayer(4,3))
+        x = np.random.rand(30)
+        self.assertTrue(all([row['passed'] for row in check_gradient(model, x, directions=5)]))
+        self.assertTrue(all([row['passed'] for row in check_gradient(model, x, processes=2, chunk_size=16)]))
+
+    def test_computational_graph(self):
+        x = Input(['x','y'],'x')
+        y = Input(['x','y'],'y')
+        net = ComputationalGraphLayer(Sigmoid(MWeight(3,2).dot(x)+VWeight(2))*y)
+        report = check_gradient(net, [np.random.rand(3), np.random.rand(2)])
+        self.assertEqual(len(report), 3)
+        self.assertTrue(all([row['passed'] for row in report]))
+
+    def test_huber_loss(self):
+        #both the quadratic and the linear branches, on both sides of t
+        x = np.array([0.1, -0.4, 2.5, -3.0, 1.3])
+        t = np.array([0.0, 0.2, 0.5, -0.5, 0.0])
+        report = check_gradient(LossLayer(HuberLoss(delta=1.5), t), x)
+        self.assertTrue(all([row['passed'] for row in report]))
+        loss = HuberLoss(delta=1.5)
+        assert_almost_equal(loss.loss(x, t), [0.005, 0.18, 1.5*(2.0-0.75), 1.5*(2.5-0.75), 0.845])
+        assert_almost_equal(loss.dJdy_gradient(x, t), [0.1, -0.6, 1.5, -1.5, 1.3])
+
+    def test_wrong_gradient(self):
+        report = check_gradient(WrongGradientLayer(3,2), np.random.rand(3))
+        self.assertFalse(any([row['passed'] for row in report]))
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from standart_network.hopfield import Hopfield, pack, unpack, hamming
+
+def energy(model, x):
+    return -0.5*x.dot(model.W).dot(x)
+
+def corrupt(x, flips):
+    y = x.copy()
+    y[np.random.choice(x.size, flips, replace=False)] *= -1
+    return y
+
+class HopfieldTests(unittest.TestCase):
+    def setUp(self):
+        self.patterns = np.sign(np.random.randn(3,200))
+
+    def test_recall(self):
+        for mode in ['sequential', 'random']:
+            model = Hopfield(200, mode=mode)
+            for pattern in self.patterns:
+                model.store(pattern)
+            for pattern in self.patterns:
+                probe = corrupt(pattern, 30)
+                y = model.forward(probe)
+                assert_array_equal(y, pattern)
+                self.assertLess(energy(model, y), energy(model, probe))
+
+    def test_fixed_point(self):
+        model = Hopfield(200)
+        model.store(self.patterns[0])
+        assert_array_equal(model.forward(self.patterns[0]), self.patterns[0])
+        assert_array_equal(model.forward(-self.patterns[0]), -self.patterns[0])
+
+    def test_max_sweeps(self):
+        model = Hopfield(200, max_sweeps=0)
+        model.store(self.patterns[0])
+        probe = corrupt(self.patterns[0], 30)
+        assert_array_equal(model.forward(probe), probe)
+
+    def test_store_matrix(self):
+        model = Hopfield(200)
+        for pattern in self.patterns:
+            model.store(pattern)
+        bulk = Hopfield(200)
+        bulk.store(self.patterns)
+        assert_array_equal(bulk.W, model.W)
+
+    def test_rules(self):
+        patterns = np.sign(np.random.randn(20,100))
+        for rule in ['pseudo-inverse', 'storkey']:
+            model = Hopfield(100, rule=rule)
+            model.store(patterns[:10])
+            model.store(patterns[10:])
+            assert_array_equal(model.forward(patterns), patterns)
+
+    def test_forward_batch(self):
+        model = Hopfield(200)
+        model.store(self.patterns)
+        probes = np.array([corrupt(pattern, 30) for pattern in self.patterns])
+        Y = model.forward(probes)
+        self.assertEqual(Y.shape, (3,200))
+        assert_array_equal(Y, np.array([model.forward(probe) for probe in probes]))
+        assert_array_equal(Y, self.patterns)
+
+    def test_compact(self):
+        model = Hopfield(200)
+        model.store(self.patterns)
+        compact = Hopfield(200, weights_dtype=np.int8)
+        compact.store(self.patterns[:1])
+        compact.store(self.patterns[1:])
+        self.assertEqual(compact.W.dtype, np.int8)
+        assert_array_equal(compact.W, model.W)
+        probes = np.array([corrupt(pattern, 30) for pattern in self.patterns])
+        assert_array_equal(compact.forward(probes), model.forward(probes))
+        assert_array_equal(compact.forward(probes[0]), model.forward(probes[0]))
+        assert_array_equal(unpack(compact.forward_packed(pack(probes)), 200), self.patterns)
+
+    def test_compact_saturation(self):
+        compact = Hopfield(10, weights_dtype=np.int8)
+        compact.store(np.ones([200,10]))
+        self.assertEqual(compact.W[0,1], 127)
+        self.assertEqual(compact.W[0,0], 0)
+        self.assertRaises(Exception, Hopfield, 10, rule='storkey', weights_dtype=np.int8)
+
+    def test_hamming(self):
+        X = np.sign(np.random.rand(7, 20)-0.5)
+        patterns = np.sign(np.random.rand(4, 20)-0.5)
+        expected = np.sum(X[:,np.newaxis,:] != patterns[np.newaxis,:,:], 2)
+        assert_array_equal(hamming(pack(X), pack(patterns)), expected)
+
+    def test_index(self):
+        model = Hopfield(200, index_radius=40)
+        model.store(self.patterns)
+        probes = np.array([corrupt(pattern, 30) for pattern in self.patterns])
+        assert_array_equal(model.lookup(probes), [0, 1, 2])
+        assert_array_equal(model.lookup(corrupt(self.patterns[0], 100)), [-1])
+        assert_array_equal(model.forward(probes), self.patterns)
+        assert_array_equal(model.forward(probes[1]), self.patterns[1])
+        model.W[...] = -np.outer(self.patterns[0], self.patterns[0])
+        model.index_fixed = None
+        assert_array_equal(model.lookup(probes[0]), [-1])
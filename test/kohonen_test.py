@@ -0,0 +1,89 @@
+import os, shutil, tempfile, unittest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_almost_equal
+
+from standart_network.kohonen import Kohonen
+from standart_network.kohonenindex import CoarseQuantizerIndex, GridLocalSearch
+
+class KohonenTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_grid_distances(self):
+        model = Kohonen(2, 25, (5,5,False))
+        assert_almost_equal(model.distance(0)[[1,5,6,24]], [1.0, 1.0, np.sqrt(2), np.sqrt(32)])
+        model = Kohonen(2, 25, (5,5,True))
+        assert_almost_equal(model.distance(0)[[1,4,20,24]], [1.0, 1.0, 1.0, np.sqrt(2)])
+        model = Kohonen(2, 6, (6,True))
+        assert_almost_equal(model.distance(0), [0.0, 1.0, 2.0, 3.0, 2.0, 1.0])
+
+    def test_best_matching_units(self):
+        model = Kohonen(3, 16, (4,4,False))
+        X = np.random.rand(20,3)
+        assert_array_equal(model.best_matching_units(X), [model.best_matching_unit(x) for x in X])
+
+    def test_train(self):
+        data = np.array([(x,y) for x in np.linspace(-5,5,5) for y in np.linspace(-5,5,5)])
+        model = Kohonen(2, 25, (5,5,False))
+        quantization_error = lambda: np.mean(np.min(np.sum((data[:,np.newaxis,:]-model.W)**2,2),1))
+        start_error = quantization_error()
+        model.train(data, 30, batch_size=25, learning_rate=(1.0,1.0), radius=(3.0,0.5))
+        self.assertEqual(model.radius, 0.5)
+        self.assertLess(quantization_error(), start_error/10)
+
+    def test_coarse_quantizer_index(self):
+        model = Kohonen(3, 100, (10,10,False))
+        X = np.random.rand(50,3)
+        exact = model.best_matching_units(X)
+        model.set_search_index(CoarseQuantizerIndex(10, n_probe=10))
+        assert_array_equal(model.best_matching_units(X), exact)
+        self.assertEqual(model.search_index.recall(model, X)['recall'], 1.0)
+        #random codebook of 100 units in 10 clusters: the nearest cluster has most of the best matching units
+        model.set_search_index(CoarseQuantizerIndex(10, n_probe=1))
+        self.assertGreaterEqual(model.search_index.recall(model, X)['recall'], 0.5)
+        model.set_search_index(CoarseQuantizerIndex(10, n_probe=3))
+        self.assertGreaterEqual(model.search_index.recall(model, X)['recall'], 0.8)
+
+    def test_coarse_quantizer_empty_cluster(self):
+        model = Kohonen(2, 16, (4,4,False))
+        X = np.random.rand(20,2)
+        index = CoarseQuantizerIndex(4, n_probe=1)
+        model.set_search_index(index)
+        #the units of the cluster nearest to every sample moved to another cluster
+        for x in X:
+            nearest = np.argmin(np.sum((index.centroids-x)**2,1))
+            other = (nearest+1) % 4
+            index.members[other] = np.concatenate([index.members[other], index.members[nearest]])
+            index.members[nearest] = np.zeros(0, dtype=int)
+        bmus = index.query(model, X)
+        self.assertTrue(all([bmu in np.concatenate(index.members) for bmu in bmus]))
+        index.n_probe = 4
+        assert_array_equal(index.query(model, X), model.exact_best_matching_units(X))
+
+    def test_grid_local_search(self):
+        model = Kohonen(1, 20, (20,False), weights=np.linspace(0,1,20).reshape(20,1))
+        X = np.random.rand(30,1)
+        exact = model.best_matching_units(X)
+        model.set_search_index(GridLocalSearch())
+        assert_array_equal(model.best_matching_units(X), exact)
+        self.assertEqual(model.forward(np.array([1.0])), 19)
+
+    def test_out_of_core(self):
+        folder = self.folder
+        data = np.memmap(os.path.join(folder, 'data.mm'), dtype=float, mode='w+', shape=(600,4))
+        data[:] = np.random.rand(600,4)
+        W = np.random.rand(36,4)
+        model = Kohonen(4, 36, (6,6,True), weights=W.copy(), learning_rate=1.0, radius=2.0)
+        out_of_core = Kohonen(4, 36, (6,6,True), weights=W.copy(), learning_rate=1.0, radius=2.0)
+        out_of_core.memmap_weights(os.path.join(folder, 'W.mm'))
+        out_of_core.chunk_size = 5
+        self.assertTrue(isinstance(out_of_core.W, np.memmap))
+        np.random.seed(3)
+        model.train(data, 2, batch_size=200, radius=(2.0,1.0))
+        np.random.seed(3)
+        out_of_core.train(data, 2, batch_size=200, radius=(2.0,1.0), processes=2)
+        assert_almost_equal(out_of_core.W, model.W)
+        assert_array_equal(out_of_core.map_data(data), model.map_data(data))
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from memory import MemoryInspector, inspect, format_report
+from network import Sequential
+from layers import LinearLayer, SigmoidLayer
+from losses import SquaredLoss
+from optimizers import GradientDescent, GradientDescentMomentum
+from trainer import Trainer
+from utils import SharedWeights
+from standart_network.vanilla import VanillaNet
+
+class MemoryTests(unittest.TestCase):
+    def test_shared_weights(self):
+        W = SharedWeights('gaussian', 3+1, 3)
+        model = Sequential(
+            LinearLayer(3, 3, weights=W),
+            LinearLayer(3, 3, weights=W),
+        )
+        report = inspect(model)
+        self.assertEqual([row['path'] for row in report], ['Sequential', 'Sequential.elements[0]', 'Sequential.elements[1]'])
+        self.assertEqual(report[1]['own']['weights'], W.W.nbytes)
+        self.assertEqual(report[1]['own']['gradients'], W.dW.nbytes)
+        self.assertEqual(report[2]['own']['weights'], 0)
+        self.assertEqual(report[0]['total']['weights'], W.W.nbytes)
+
+        x = np.random.rand(3)
+        model.forward(x)
+        report = inspect(model)
+        #the input of the second layer with the bias
+        self.assertEqual(report[1]['own']['activations'], 4*8)
+        self.assertEqual(report[2]['own']['activations'], 4*8)
+        self.assertEqual(report[0]['total']['bytes'], W.W.nbytes+W.dW.nbytes+2*4*8)
+        self.assertEqual(len(format_report(report).split('\n')), 4)
+
+    def test_optimizer_state(self):
+        model = Sequential(LinearLayer(2, 3))
+        optimizer = GradientDescentMomentum(learning_rate=0.1, momentum=0.9)
+        model.forward(np.ones(2))
+        model.backward(np.ones(3), optimizer)
+        self.assertEqual(inspect(model, optimizer)[1]['own']['optimizer'], 0)
+        optimizer.update_model()
+        self.assertEqual(inspect(model, optimizer)[1]['own']['optimizer'], 3*3*8)
+        self.assertEqual(inspect(model)[1]['own']['optimizer'], 0)
+
+    def test_peak(self):
+        model = Sequential(
+            LinearLayer(2, 4),
+            SigmoidLayer,
+            LinearLayer(4, 2),
+        )
+        inspector = MemoryInspector(model)
+        before = inspector.sample()
+        train = [(np.random.rand(2), np.random.rand(2)) for i in range(4)]
+        Trainer(memory=inspector).learn(model, train, SquaredLoss(), GradientDescent(learning_rate=0.1), epochs=1, batch_size=2)
+        self.assertEqual(inspector.samples, 1+2*(2*2+1))
+        self.assertTrue(inspector.peak > before)
+        self.assertTrue(inspector.peak_phase in ['forward', 'backward', 'update_model'])
+        self.assertEqual(inspector.peak_report[0]['total']['bytes'], inspector.peak)
+
+    def test_rnn_nodes(self):
+        model = VanillaNet(2, 2, 3)
+        model.on_message('init_nodes', 2)
+        for i in range(2):
+            model.forward(np.random.rand(2), True)
+        report = inspect(model)
+        paths = [row['path'] for row in report]
+        self.assertTrue('VanillaNet.nodes[0]' in paths)
+        self.assertTrue('VanillaNet.nodes[1]' in paths)
+        nodes = [row for row in report if row['path'] in ['VanillaNet.nodes[0]', 'VanillaNet.nodes[1]']]
+        #the weights are shared by all the nodes
+        self.assertEqual(sum([row['total']['weights'] for row in nodes]), 0)
+        self.assertTrue(all([row['total']['activations'] > 0 for row in nodes]))
+        weights = sum([weight.W.nbytes for name, weight in model.shared_weights()])
+        self.assertEqual(report[0]['total']['weights'], weights)
+
+if __name__ == '__main__':
+    unittest.main()
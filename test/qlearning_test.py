@@ -0,0 +1,274 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_almost_equal
+
+from replaymemory import ReplayMemory, PrioritizedReplayMemory, SumTree
+import collections
+
+from qlearning import DeepAgent, Agent, BatchAgent, GenericAgent, AseAce, AseAcePopulation
+from network import Sequential
+from layers import LinearLayer, TanhLayer
+from losses import SquaredLoss, HuberLoss, CrossEntropyLoss
+from optimizers import GradientDescent
+from trainer import Trainer
+from utils import SharedWeights
+import utils
+
+class ReplayMemoryTests(unittest.TestCase):
+    def test_ring_buffer(self):
+        memory = ReplayMemory(5)
+        for i in range(7):
+            memory.append(np.array([i, -i]), i % 3, float(i), np.array([i+1, -i-1]), i == 6)
+        self.assertEqual(len(memory), 5)
+        self.assertEqual(memory.cursor, 2)
+        assert_array_equal(memory.rewards, [5.0, 6.0, 2.0, 3.0, 4.0])
+        states, actions, rewards, next_states, dones = memory.sample(100)
+        self.assertEqual(states.shape, (100, 2))
+        assert_array_equal(states[:,0], rewards)
+        assert_array_equal(next_states[:,0], rewards+1)
+        assert_array_equal(actions, rewards.astype(int) % 3)
+        assert_array_equal(dones, rewards == 6)
+
+    def test_extend(self):
+        memory = PrioritizedReplayMemory(5)
+        memory.append(np.array([0, 0]), 0, 0.0, np.array([1, -1]), False)
+        states = np.array([[i, -i] for i in range(1, 7)])
+        positions = memory.extend(states, np.arange(1, 7) % 3, np.arange(1.0, 7.0), states+1, np.arange(1, 7) == 6)
+        assert_array_equal(positions, [2, 3, 4, 0, 1])
+        self.assertEqual(len(memory), 5)
+        self.assertEqual(memory.cursor, 2)
+        assert_array_equal(memory.rewards, [5.0, 6.0, 2.0, 3.0, 4.0])
+        assert_array_equal(memory.states[:,1], -memory.rewards)
+        assert_array_equal(memory.dones, memory.rewards == 6)
+        self.assertAlmostEqual(memory.tree.total(), 5.0)
+
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 2.0, 3.0, 4.0, 0.0])
+        self.assertEqual(tree.total(), 10.0)
+        assert_array_equal(tree.find([0.5, 1.5, 2.5, 5.9, 6.1, 9.9]), [0, 1, 1, 2, 3, 3])
+        tree.update([3, 1], [0.0, 0.5])
+        self.assertEqual(tree.total(), 4.5)
+        assert_array_equal(tree.get([1, 3]), [0.5, 0.0])
+
+    def test_prioritized(self):
+        memory = PrioritizedReplayMemory(4, alpha=1.0, beta=1.0)
+        for i in range(4):
+            memory.append(np.array([i]), 0, 0.0, np.array([i]), False)
+        memory.update_priorities([0, 1, 2, 3], [1.0, 0.0, 0.0, 3.0])
+        indices = memory.sample_indices(1000)
+        self.assertTrue(set(indices) <= set([0, 1, 2, 3]))
+        self.assertTrue(abs(np.mean(indices == 3)-0.75) < 0.05)
+        weights = memory.weights(np.array([0, 3]))
+        self.assertAlmostEqual(weights[0], 1.0)
+        self.assertAlmostEqual(weights[1], 1.0/3.0, places=5)
+        memory.append(np.array([4]), 0, 0.0, np.array([4]), False)
+        self.assertAlmostEqual(memory.tree.get([0])[0], 3.0, places=5)
+
+class AseAcePopulationTests(unittest.TestCase):
+    def test_same_as_aseace(self):
+        delta = np.array([0.5, 0.8, 0.9])
+        sigma = np.array([0.0, 0.5, 1.0])
+        gamma = np.array([0.9, 0.95, 0.99])
+        controllers = [AseAce(4, d, learning_rate=0.2, sigma=s, gamma=g) for d, s, g in zip(delta, sigma, gamma)]
+        population = AseAcePopulation(3, 4, delta, learning_rate=0.2, sigma=sigma, gamma=gamma)
+        for i in range(30):
+            x = utils.to_one_hot_vect(i % 4, 4)
+            r = 1.0 if i % 7 == 0 else 0.0
+            np.random.seed(i)
+            if r != 0:
+                actions = [np.argmax(controller.reinforcement(x, r)) for controller in controllers]
+            else:
+                actions = [np.argmax(controller.forward(x)) for controller in controllers]
+            np.random.seed(i)
+            if r != 0:
+                assert_array_equal(population.reinforcement(x, r), actions)
+            else:
+                assert_array_equal(population.forward(x), actions)
+        for k, controller in enumerate(controllers):
+            assert_almost_equal(population.ase_W[k], controller.ase.W)
+            assert_almost_equal(population.ace_W[k], controller.ace.W)
+
+    def test_states(self):
+        population = AseAcePopulation(5, 2, 0.8)
+        X = np.random.rand(5, 2)
+        self.assertEqual(population.forward(X).shape, (5,))
+        assert_array_equal(population.x, X)
+
+class BatchAgentTests(unittest.TestCase):
+    def test_same_as_agent(self):
+        agents = [Agent(4, 3, policy='greedy') for i in range(3)]
+        batch = BatchAgent(4, 3, policy='greedy')
+        for agent in agents:
+            agent.Q = np.random.rand(3, 4)
+        batch.Q = agents[0].Q.copy()
+        for agent in agents[1:]:
+            agent.Q = batch.Q.copy()
+        states = np.array([0, 1, 2])
+        actions = batch.forward(states)
+        for agent, state, action in zip(agents, states, actions):
+            self.assertEqual(np.argmax(agent.forward(utils.to_one_hot_vect(state, 4))), action)
+        next_states = np.array([3, 2, 0])
+        rewards = np.array([1.0, -1.0, 0.5])
+        batch.reinforcement(next_states, rewards)
+        #one agent for each environment, the states are different so the updated cells too
+        for agent, state, action, next_state, reward in zip(agents, states, actions, next_states, rewards):
+            agent.reinforcement(utils.to_one_hot_vect(next_state, 4), reward)
+            self.assertAlmostEqual(batch.Q[action, state], agent.Q[action, state])
+
+    def test_scatter_and_done(self):
+        batch = BatchAgent(2, 2, learning_rate=0.5, gamma=1.0, policy='eps-greedy', epsilon=1.0)
+        batch.Q[:] = [[0.0, 4.0], [0.0, 2.0]]
+        batch.x = np.array([0, 0, 0])
+        batch.y = np.array([1, 1, 0])
+        actions = batch.reinforcement(np.array([1, 1, 1]), np.array([1.0, 1.0, 1.0]), np.array([False, True, False]))
+        self.assertEqual(actions.shape, (3,))
+        self.assertTrue(set(actions) <= set([0, 1]))
+        #two updates of Q[1,0]: 0.5*(1+4) and 0.5*1
+        self.assertAlmostEqual(batch.Q[1, 0], 3.0)
+        self.assertAlmostEqual(batch.Q[0, 0], 2.5)
+
+class RecordTrainer(Trainer):
+    def __init__(self):
+        Trainer.__init__(self)
+        self.batches = []
+
+    def learn_minibatch_arrays(self, model, X, T, loss, optimizer):
+        self.batches.append([(x.copy(), t.copy()) for x, t in zip(X, T)])
+
+class GenericAgentTests(unittest.TestCase):
+    def test_history(self):
+        agent = GenericAgent(Sequential(LinearLayer(2,3)), 3, 4, 1.0)
+        trainer = RecordTrainer()
+        agent.set_training_options(trainer, SquaredLoss(), GradientDescent(learning_rate=0.1))
+        states = collections.deque(maxlen=4)
+        commands = collections.deque(maxlen=4)
+        expected = []
+        for i in range(15):
+            x = np.random.rand(2)
+            r = float(i % 3 == 0)
+            if i == 9:
+                agent.clear()
+                commands.clear()
+            states.append(x)
+            commands.append(agent.command)
+            if r != 0 and len(commands) >= 4:
+                expected.append(zip(states, r*agent.e*np.array(commands)))
+            agent.reinforcement(x, r)
+        self.assertEqual(len(trainer.batches), len(expected))
+        self.assertEqual(len(expected), 3)
+        for batch, expected_batch in zip(trainer.batches, expected):
+            for (x, t), (expected_x, expected_t) in zip(batch, expected_batch):
+                assert_array_equal(x, expected_x)
+                assert_array_equal(t, expected_t)
+
+    def test_learn_minibatch_arrays(self):
+        X = np.random.rand(4, 2)
+        T = np.random.rand(4, 3)
+        models = [Sequential(LinearLayer(2,3,'ones'), TanhLayer) for i in range(2)]
+        optimizers = [GradientDescent(learning_rate=0.1) for i in range(2)]
+        J, dJdy = Trainer().learn_minibatch(models[0], zip(X, T), SquaredLoss(), optimizers[0])
+        J_arrays, dJdy_arrays = Trainer().learn_minibatch_arrays(models[1], X, T, SquaredLoss(), optimizers[1])
+        assert_almost_equal(J_arrays, J)
+        assert_almost_equal(dJdy_arrays, dJdy)
+        assert_almost_equal(models[1].elements[0].W.get(), models[0].elements[0].W.get())
+
+class DeepAgentTests(unittest.TestCase):
+    def test_reinforcement(self):
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        Q_hat = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = DeepAgent(Q, Q_hat, 50, minibatch_size=10)
+        agent.set_training_options(Trainer(), SquaredLoss(), GradientDescent(learning_rate=0.01))
+        for i in range(30):
+            action = agent.forward(np.random.rand(2))
+            self.assertTrue(action in [0, 1, 2])
+            J, dJdy = agent.reinforcement(np.random.rand(2), 1.0, i % 10 == 0)
+            if i < 9:
+                self.assertEqual(J, 0)
+        self.assertEqual(len(agent.D), 30)
+        self.assertTrue(J > 0)
+
+    def test_prioritized_reinforcement(self):
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = DeepAgent(Q, Q, 50, minibatch_size=10, prioritized=True)
+        agent.set_training_options(Trainer(), SquaredLoss(), GradientDescent(learning_rate=0.01))
+        for i in range(30):
+            agent.forward(np.random.rand(2))
+            agent.reinforcement(np.random.rand(2), 1.0, False)
+        self.assertTrue(agent.D.tree.total() > 0)
+
+    def test_batched(self):
+        for loss in [SquaredLoss(), HuberLoss(), CrossEntropyLoss()]:
+            agents = []
+            for batched in [True, False]:
+                W1 = SharedWeights('gaussian', 2+1, 4)
+                W2 = SharedWeights('gaussian', 4+1, 3)
+                Q = Sequential(LinearLayer(2,4,weights=W1), TanhLayer, LinearLayer(4,3,weights=W2))
+                Q_hat = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+                agent = DeepAgent(Q, Q_hat, 50, minibatch_size=10, gamma=0.9, target_update=5, batched=batched)
+                agent.set_training_options(Trainer(), loss, GradientDescent(learning_rate=0.01))
+                agents.append(agent)
+            agents[1].Q.elements[0].W.W[...] = agents[0].Q.elements[0].W.W
+            agents[1].Q.elements[2].W.W[...] = agents[0].Q.elements[2].W.W
+            agents[1].update_target()
+            for i in range(20):
+                x, next_x, action = np.random.rand(2), np.random.rand(2), i % 3
+                results = []
+                for agent in agents:
+                    agent.x, agent.action = x, action
+                    np.random.seed(i)
+                    results.append(agent.reinforcement(next_x, float(i)/10, i % 4 == 0))
+                assert_almost_equal(results[0], results[1])
+            assert_almost_equal(agents[0].Q.elements[2].W.get(), agents[1].Q.elements[2].W.get())
+            assert_almost_equal(agents[0].Q.elements[0].W.get(), agents[1].Q.elements[0].W.get())
+
+    def test_defaults(self):
+        #per sample loop and targets computed with Q
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        Q_hat = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = DeepAgent(Q, Q_hat, 50, minibatch_size=5)
+        self.assertFalse(agent.batched)
+        self.assertTrue(agent.target_network() is Q)
+        agent.set_training_options(Trainer(), HuberLoss(), GradientDescent(learning_rate=0.1))
+        for i in range(10):
+            agent.forward(np.random.rand(2))
+            J, dJdy = agent.reinforcement(np.random.rand(2), 1.0, False)
+        self.assertTrue(J > 0)
+
+    def test_batched_needs_batch_models(self):
+        from network import Parallel
+        Q = Sequential(LinearLayer(2,4), Parallel(LinearLayer(4,3), LinearLayer(4,3)))
+        Q_hat = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        self.assertRaises(Exception, DeepAgent, Q, Q_hat, 50, target_update=5, batched=True)
+        self.assertRaises(Exception, DeepAgent, Q_hat, Q, 50, target_update=5, batched=True)
+        DeepAgent(Q, Q_hat, 50, target_update=5)
+
+    def test_huber_descent(self):
+        #terminal transitions with reward 2: Q(x)[action] moves towards 2 in both the branches of the loss
+        for batched in [True, False]:
+            Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+            agent = DeepAgent(Q, None, 50, minibatch_size=5, batched=batched)
+            agent.set_training_options(Trainer(), HuberLoss(delta=0.5), GradientDescent(learning_rate=0.05))
+            x = np.array([0.3, -0.2])
+            before = abs(Q.forward(x)[1]-2.0)
+            for i in range(100):
+                agent.x, agent.action = x, 1
+                agent.reinforcement(x, 2.0, True)
+            self.assertTrue(abs(Q.forward(x)[1]-2.0) < before/2)
+
+    def test_target_update(self):
+        Q = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        Q_hat = Sequential(LinearLayer(2,4), TanhLayer, LinearLayer(4,3))
+        agent = DeepAgent(Q, Q_hat, 50, minibatch_size=5, target_update=3)
+        agent.set_training_options(Trainer(), SquaredLoss(), GradientDescent(learning_rate=0.1))
+        assert_array_equal(Q_hat.elements[0].W.get(), Q.elements[0].W.get())
+        for i in range(7):
+            agent.forward(np.random.rand(2))
+            agent.reinforcement(np.random.rand(2), 1.0, False)
+        #3 minibatches, Q_hat is synced after the third
+        self.assertEqual(agent.steps, 3)
+        assert_array_equal(Q_hat.elements[2].W.get(), Q.elements[2].W.get())
+        agent.forward(np.random.rand(2))
+        agent.reinforcement(np.random.rand(2), 1.0, False)
+        self.assertEqual(agent.steps, 4)
+        self.assertFalse(np.allclose(Q_hat.elements[2].W.get(), Q.elements[2].W.get()))
@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal, assert_almost_equal
+
+from qtable import SparseQTable
+from qlearning import Agent, BatchAgent
+import utils
+
+class SparseQTableTests(unittest.TestCase):
+    def test_default_and_add(self):
+        table = SparseQTable(3, default=0.5, capacity=4)
+        assert_array_equal(table.values([10**12, 7]), 0.5*np.ones([3, 2]))
+        self.assertEqual(len(table), 0)
+        table.add(np.array([0, 0, 2]), np.array([7, 7, 10**12]), np.array([1.0, 2.0, -1.0]))
+        self.assertEqual(len(table), 2)
+        assert_array_equal(table.values([7, 10**12, 3]), [[3.5, 0.5, 0.5], [0.5, 0.5, 0.5], [0.5, -0.5, 0.5]])
+
+    def test_same_as_dense(self):
+        dense = np.zeros([2, 5000])
+        table = SparseQTable(2, capacity=2)
+        for i in range(20):
+            states = np.random.randint(0, 5000, 100)
+            actions = np.random.randint(0, 2, 100)
+            deltas = np.random.rand(100)
+            np.add.at(dense, (actions, states), deltas)
+            table.add(actions, states, deltas)
+        assert_almost_equal(table.values(np.arange(5000)), dense)
+        self.assertEqual(len(table), np.sum(np.any(dense != 0, 0)))
+        self.assertTrue(2*table.filled <= table.keys.size)
+
+    def test_lru_eviction(self):
+        table = SparseQTable(1, max_states=3)
+        for state in [1, 2, 3]:
+            table.add([0], [state], [float(state)])
+        table.values([1])
+        table.add([0], [4], [4.0])
+        self.assertEqual(len(table), 3)
+        assert_array_equal(table.values([1, 2, 3, 4]), [[1.0, 0.0, 3.0, 4.0]])
+        for state in range(5, 100):
+            table.add([0, 0], [1, state], [0.0, 1.0])
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.rows.shape[0], 16)
+        assert_array_equal(table.values([1, 98, 99, 97]), [[1.0, 1.0, 1.0, 0.0]])
+
+    def test_max_states(self):
+        table = SparseQTable(1, max_states=2)
+        table.add([0], [1], [1.0])
+        self.assertRaises(Exception, table.add, [0, 0, 0], [2, 3, 4], [1.0, 1.0, 1.0])
+        self.assertEqual(len(table), 1)
+        table.add([0, 0], [2, 3], [1.0, 1.0])
+        self.assertEqual(len(table), 2)
+
+    def test_agent(self):
+        #one-hot states for the dense table, integer ids for the sparse one
+        dense = Agent(10, 2, policy='greedy')
+        sparse = Agent(10, 2, policy='greedy', table=SparseQTable(2))
+        assert_array_equal(dense.forward(utils.to_one_hot_vect(3, 10)), sparse.forward(3))
+        for i in range(50):
+            state = np.random.randint(0, 10)
+            r = np.random.rand()
+            assert_array_equal(dense.reinforcement(utils.to_one_hot_vect(state, 10), r), sparse.reinforcement(state, r))
+        assert_almost_equal(sparse.Q.values(np.arange(10)), dense.Q)
+        huge = Agent(10**12, 2, policy='greedy', table=SparseQTable(2))
+        huge.forward(10**11)
+        huge.reinforcement(10**12-1, 1.0)
+        self.assertEqual(len(huge.Q), 1)
+        self.assertTrue(huge.Q.values([10**11])[0, 0] > 0)
+
+    def test_negative_states(self):
+        table = SparseQTable(2)
+        table.add([0], [5], [1.0])
+        self.assertRaises(Exception, table.add, [0], [-1], [1.0])
+        self.assertRaises(Exception, table.values, [5, -2])
+        assert_array_equal(table.values([5]), [[1.0], [0.0]])
+
+    def test_batch_agent(self):
+        dense = BatchAgent(10, 2, policy='greedy')
+        sparse = BatchAgent(10, 2, policy='greedy', table=SparseQTable(2))
+        states = np.random.randint(0, 10, 8)
+        assert_array_equal(dense.forward(states), sparse.forward(states))
+        for i in range(50):
+            states = np.random.randint(0, 10, 8)
+            rewards = np.random.rand(8)
+            done = np.random.rand(8) < 0.2
+            assert_array_equal(dense.reinforcement(states, rewards, done), sparse.reinforcement(states, rewards, done))
+        assert_almost_equal(sparse.Q.values(np.arange(10)), dense.Q)
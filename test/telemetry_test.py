@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from telemetry import Telemetry, format_summary
+from network import Sequential
+from layers import LinearLayer, SigmoidLayer
+from losses import SquaredLoss
+from optimizers import GradientDescent
+from trainer import Trainer
+from standart_network.vanilla import VanillaNet
+
+class TelemetryTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_ring_buffer(self):
+        telemetry = Telemetry(size=4, flush_every=2)
+        for i in range(6):
+            telemetry.record(10, float(i), 0.0, i, 0.25, 0.5, 0.125, i+1.0)
+        self.assertEqual(len(telemetry), 4)
+        assert_array_equal(telemetry.history()['loss'], [2.0, 3.0, 4.0, 5.0])
+        assert_array_equal(telemetry.history()['batch'], [2, 3, 4, 5])
+        assert_array_equal(telemetry.history()['samples_per_second'], 10.0)
+        assert_array_equal(telemetry.history()['data_time'], 0.0)
+        summary = telemetry.summary()
+        self.assertEqual(summary['batches'], 6)
+        self.assertAlmostEqual(summary['samples_per_second'], 10.0)
+        self.assertAlmostEqual(summary['forward_time_p50'], 0.25)
+
+    def test_flush(self):
+        filename = os.path.join(self.dir, 'telemetry.csv')
+        telemetry = Telemetry(size=4, filename=filename, flush_every=3)
+        for i in range(7):
+            telemetry.record(1, float(i), 0.0, 2*i, 0.0, 0.0, 0.0, 2*i+1.0)
+        telemetry.flush()
+        data = np.genfromtxt(filename, delimiter=',', names=True)
+        assert_array_equal(data['loss'], np.arange(7.0))
+        assert_array_equal(data['data_time'], [0.0]+[1.0]*6)
+
+        telemetry = Telemetry(size=4, filename=os.path.join(self.dir, 'telemetry.npy'), flush_every=2)
+        for i in range(5):
+            telemetry.record(1, float(i), 0.0, i, 0.0, 0.0, 0.0, i+1.0)
+        self.assertEqual(np.load(os.path.join(self.dir, 'telemetry_000001.npy'))['loss'].tolist(), [2.0, 3.0])
+
+    def test_trainer(self):
+        records = []
+        telemetry = Telemetry(callback=lambda record: records.append(record['samples']))
+        model = Sequential(LinearLayer(2,3), SigmoidLayer)
+        train = [(np.random.rand(2), np.random.rand(3)) for i in range(20)]
+        Trainer(telemetry=telemetry).learn(model, train, SquaredLoss(), GradientDescent(learning_rate=0.1), 3, batch_size=5)
+        self.assertEqual(len(telemetry), 12)
+        self.assertEqual(records, [5]*12)
+        assert_array_equal(telemetry.history()['epoch'], np.repeat([0, 1, 2], 4))
+        self.assertTrue(np.all(telemetry.history()['batch_time'] >= telemetry.history()['forward_time']))
+        self.assertTrue(format_summary(telemetry.summary()).startswith('batches: 12'))
+
+    def test_flush_without_filename(self):
+        telemetry = Telemetry(size=4, flush_every=2)
+        for i in range(3):
+            telemetry.record(1, float(i), 0.0, i, 0.0, 0.0, 0.0, i+1.0)
+        telemetry.flush()
+        self.assertEqual(len(telemetry), 3)
+
+    def test_throughtime(self):
+        telemetry = Telemetry()
+        model = VanillaNet(2, 2, 3)
+        train = [(np.random.rand(2), np.random.rand(2)) for i in range(12)]
+        Trainer(telemetry=telemetry).learn_throughtime(model, train, SquaredLoss(), GradientDescent(learning_rate=0.1), 2, window_size=4)
+        self.assertEqual(len(telemetry), 6)
+        assert_array_equal(telemetry.history()['samples'], 4)
+        assert_array_equal(telemetry.history()['epoch'], np.repeat([0, 1], 3))
+        self.assertTrue(np.all(telemetry.history()['backward_time'] > 0))
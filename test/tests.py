@@ -2,9 +2,24 @@ import unittest
 import numpy as np
 from numpy.testing import assert_array_equal, assert_almost_equal
 
-from layers import LinearLayer, ReluLayer, SigmoidLayer, SoftMaxLayer, NormalizationLayer
+from layers import LinearLayer, ReluLayer, SigmoidLayer, SoftMaxLayer, NormalizationLayer, RandomGaussianLayer
 from losses import SquaredLoss, NegativeLogLikelihoodLoss, CrossEntropyLoss
-from network import Sequential
+from network import Sequential, Parallel
+from optimizers import GradientDescent
+from genericlayer import GenericLayer
+from utils import SharedWeights
+
+#layer that changes its buffer and its weights in place at every update
+class InPlaceLayer(GenericLayer):
+    def __init__(self):
+        self.W = SharedWeights('ones', 2, 2)
+        self.steps = np.zeros(1)
+
+    def forward(self, x, update = False):
+        if update:
+            self.steps += 1
+            self.W.W *= 2
+        return x
 
 class LinearLayerTests(unittest.TestCase):
     def test_dim(self):
@@ -52,6 +67,22 @@ class LinearLayerTests(unittest.TestCase):
             gradient = l.numeric_gradient(x)
             assert_almost_equal(in_delta[i]*gradient[i,:],delta,decimal=5)
 
+    def test_batch(self):
+        l = LinearLayer(2,3,'random')
+        X = np.random.rand(4,2)
+        dJdy = np.random.rand(4,3)
+        Y = l.forward(X)
+        d = l.backward(dJdy)
+        dJdW = l.dJdW_gradient(dJdy)
+        self.assertEqual(Y.shape,(4,3))
+        self.assertEqual(d.shape,(4,2))
+        dJdW_sum = np.zeros((3,3))
+        for i in range(4):
+            assert_almost_equal(Y[i],l.forward(X[i]))
+            assert_almost_equal(d[i],l.backward(dJdy[i]))
+            dJdW_sum += l.dJdW_gradient(dJdy[i])
+        assert_almost_equal(dJdW,dJdW_sum)
+
 class ReluLayerTests(unittest.TestCase):
     def test_forward_backward(self):
         l = ReluLayer()
@@ -130,6 +161,16 @@ class SoftMaxLayerTests(unittest.TestCase):
             gradient = l.numeric_gradient(x)
             assert_almost_equal(in_delta[i]*gradient[i,:],delta,decimal=5)
 
+    def test_batch(self):
+        l = SoftMaxLayer()
+        X = np.random.rand(4,3)
+        dJdy = np.random.rand(4,3)
+        Y = l.forward(X)
+        d = l.backward(dJdy)
+        for i in range(4):
+            assert_almost_equal(Y[i],l.forward(X[i]))
+            assert_almost_equal(d[i],l.backward(dJdy[i]))
+
 class NegativeLogLikelihoodLossTests(unittest.TestCase):
     def test_calc_loss(self):
         l1 = SoftMaxLayer()
@@ -273,6 +314,65 @@ class SequentialTests(unittest.TestCase):
         self.assertEqual(d.shape,(1,))
         assert_array_equal(d,np.array([0.25]))
 
+    def test_weights_version(self):
+        n = Sequential(LinearLayer(2,3), SigmoidLayer, LinearLayer(3,2))
+        version = n.weights_version()
+        self.assertEqual(len(version),2)
+        self.assertEqual(n.weights_version(),version)
+        optimizer = GradientDescent(learning_rate=0.1)
+        n.forward(np.array([1.0,2.0]))
+        n.backward(np.array([1.0,1.0]), optimizer)
+        optimizer.update_model()
+        self.assertNotEqual(n.weights_version(),version)
+
+    def test_weights_version_rebound(self):
+        n = Sequential(LinearLayer(2,3))
+        version = n.weights_version()
+        n.elements[0].W.W = np.ones([3,3])
+        self.assertNotEqual(n.weights_version(), version)
+
+    def test_accepts_batch(self):
+        self.assertTrue(Sequential(LinearLayer(2,3), SigmoidLayer, SoftMaxLayer).accepts_batch())
+        self.assertFalse(Sequential(LinearLayer(2,3), Parallel(LinearLayer(3,2), LinearLayer(3,2))).accepts_batch())
+
+    def test_summary(self):
+        n = Sequential(LinearLayer(2,3), SigmoidLayer, LinearLayer(3,2))
+        rows = n.summary(2, batch_size=4)
+        self.assertEqual([row['path'] for row in rows], ['Sequential', 'Sequential.elements[0]', 'Sequential.elements[1]', 'Sequential.elements[2]'])
+        self.assertEqual([row['output_shape'] for row in rows], [(2,), (3,), (3,), (2,)])
+        self.assertEqual([row['params'] for row in rows], [0, 9, 0, 8])
+        self.assertEqual([row['forward_macs'] for row in rows], [0, 4*9, 0, 4*8])
+        self.assertEqual([row['backward_macs'] for row in rows], [0, 2*4*9, 0, 2*4*8])
+        #the output of the Sequential is the output of its last layer
+        self.assertEqual([row['activation_bytes'] for row in rows], [0, 4*3*8, 4*3*8, 4*2*8])
+        self.assertFalse(hasattr(n.elements[0], 'x'))
+
+    def test_summary_restores_state(self):
+        n = Sequential(LinearLayer(2,3), Parallel(LinearLayer(3,2), LinearLayer(3,2)), RandomGaussianLayer)
+        x = np.array([1.0,2.0])
+        y = n.forward(x, True)
+        vect_size = list(n.elements[1].vect_size)
+        state = np.random.get_state()
+        rows = n.summary(2, window_size=None)
+        self.assertEqual(rows[0]['output_shape'], (4,))
+        self.assertEqual(n.elements[1].vect_size, vect_size)
+        assert_array_equal(n.elements[0].x, np.hstack([x, 1]))
+        self.assertFalse('forward' in n.elements[0].__dict__)
+        self.assertEqual(np.random.get_state()[2], state[2])
+        assert_array_equal(np.random.get_state()[1], state[1])
+
+    def test_summary_restores_arrays(self):
+        layer = InPlaceLayer()
+        n = Sequential(LinearLayer(2,3), layer)
+        steps, W = layer.steps, layer.W.W
+        #the forwards of a window are with update
+        rows = n.summary(2, window_size=2)
+        self.assertEqual(rows[2]['calls'], 2)
+        self.assertTrue(layer.steps is steps)
+        assert_array_equal(layer.steps, [0.0])
+        self.assertTrue(layer.W.W is W)
+        assert_array_equal(layer.W.W, np.ones([2, 2]))
+
     # def test_SquaredLoss(self):
     #     errSq = SquaredLoss()
     #     n = Sequential([errSq])
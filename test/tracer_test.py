@@ -0,0 +1,97 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from tracer import Tracer, merge
+from network import Sequential
+from layers import LinearLayer, SigmoidLayer
+from losses import SquaredLoss
+from optimizers import GradientDescent
+from trainer import Trainer
+
+_traced = None
+
+def _traced_forward(x):
+    tracer, model = _traced
+    with tracer.span('worker'):
+        return model.forward(x)
+
+class TracerTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'trace.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def inside(self, event, outer):
+        return outer['ts'] <= event['ts'] and event['ts']+event['dur'] <= outer['ts']+outer['dur']+1e-3
+
+    def test_trainer(self):
+        tracer = Tracer(self.filename)
+        model = tracer.instrument(Sequential(
+            LinearLayer(2, 3),
+            SigmoidLayer,
+        ))
+        train = [(np.random.rand(2), np.random.rand(3)) for i in range(4)]
+        Trainer(tracer=tracer).learn(model, train, SquaredLoss(), GradientDescent(learning_rate=0.1), epochs=2, batch_size=2)
+        events = tracer.save()
+        names = [event['name'] for event in events]
+        self.assertEqual(names.count('shuffle/split'), 2)
+        self.assertEqual(names.count('minibatch'), 4)
+        self.assertEqual(names.count('update_model'), 4)
+        self.assertEqual(names.count('Sequential'), 16)
+        self.assertEqual(names.count('Sequential.elements[0]'), 16)
+        self.assertEqual(names.count('Sequential.elements[1]'), 16)
+        minibatches = [event for event in events if event['name'] == 'minibatch']
+        for event in events:
+            if event['name'] in ['forward', 'backward', 'update_model', 'Sequential.elements[0]']:
+                self.assertTrue(any([self.inside(event, minibatch) for minibatch in minibatches]))
+        f = open(self.filename)
+        saved = json.load(f)
+        f.close()
+        self.assertEqual(len(saved['traceEvents']), len(events))
+        self.assertTrue(all([event['ph'] == 'X' for event in saved['traceEvents']]))
+
+        tracer.uninstrument(model)
+        tracer.events = []
+        model.forward(np.random.rand(2))
+        self.assertEqual(tracer.events, [])
+
+    def test_processes(self):
+        global _traced
+        tracer = Tracer(self.filename)
+        model = tracer.instrument(Sequential(
+            LinearLayer(2, 3),
+            SigmoidLayer,
+        ))
+        with tracer.span('map'):
+            _traced = (tracer, model)
+            pool = multiprocessing.Pool(2)
+            try:
+                pool.map(_traced_forward, [np.random.rand(2) for i in range(6)])
+            finally:
+                pool.close()
+                pool.join()
+                _traced = None
+        events = tracer.save()
+        names = [event['name'] for event in events]
+        self.assertEqual(names.count('map'), 1)
+        self.assertEqual(names.count('worker'), 6)
+        self.assertEqual(names.count('Sequential.elements[0]'), 6)
+        self.assertTrue(all([event['pid'] != os.getpid() for event in events if event['name'] == 'worker']))
+        self.assertEqual(os.listdir(self.dir), ['trace.json'])
+
+        other = os.path.join(self.dir, 'other.json')
+        Tracer(other).save()
+        merge([self.filename, other], os.path.join(self.dir, 'merged.json'))
+        f = open(os.path.join(self.dir, 'merged.json'))
+        self.assertEqual(len(json.load(f)['traceEvents']), len(events))
+        f.close()
+
+if __name__ == '__main__':
+    unittest.main()
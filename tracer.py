@@ -0,0 +1,131 @@
+import glob
+import json
+import os
+import time
+
+#Timeline of a run in the Chrome trace event format (chrome://tracing or https://ui.perfetto.dev).
+#A Tracer records complete events (spans with start and duration in microseconds):
+#- Trainer(tracer = tracer) traces the phases of the training (shuffle/split, minibatch, window,
+#  forward, backward, update_model),
+#- tracer.instrument(model) traces forward and backward of every layer of the model tree,
+#  the spans of the layers with a window_step (RNN) have the step in the args.
+#The events of forked processes (process pools) are appended by every process to its own
+#file filename.<pid>.part when its outermost span ends; save() merges them in filename.
+
+class NoSpan():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+NO_SPAN = NoSpan()
+
+def span(tracer, name, category = 'trainer', args = None):
+    if tracer is None:
+        return NO_SPAN
+    return tracer.span(name, category, args)
+
+class Span():
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.tracer.check_fork()
+        self.tracer.depth += 1
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self.tracer.add(self.name, self.category, self.start, time.time(), self.args)
+        return False
+
+class Tracer():
+    def __init__(self, filename = 'trace.json'):
+        self.filename = filename
+        self.main_pid = os.getpid()
+        self.pid = self.main_pid
+        self.events = []
+        self.depth = 0
+
+    def span(self, name, category = 'trainer', args = None):
+        return Span(self, name, category, args)
+
+    #in a forked process the events and the open spans of the parent are not of this process
+    def check_fork(self):
+        if os.getpid() != self.pid:
+            self.pid = os.getpid()
+            self.events = []
+            self.depth = 0
+
+    def add(self, name, category, start, end, args = None):
+        self.depth -= 1
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start*1e6, 'dur': (end-start)*1e6, 'pid': self.pid, 'tid': 0}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+        if self.pid != self.main_pid and self.depth == 0:
+            self.flush_part()
+
+    def part_filename(self, pid):
+        return '%s.%d.part' % (self.filename, pid)
+
+    def flush_part(self):
+        f = open(self.part_filename(self.pid), 'a')
+        for event in self.events:
+            f.write(json.dumps(event)+'\n')
+        f.close()
+        self.events = []
+
+    def traced(self, name, category, layer, method):
+        def call(*args, **kwargs):
+            step = {'window_step': layer.window_step} if hasattr(layer, 'window_step') else None
+            with self.span(name, category, step):
+                return method(*args, **kwargs)
+        return call
+
+    #forward and backward of every layer of the model are traced with the path of the layer as name
+    def instrument(self, model):
+        for path, layer in model.walk(model.__class__.__name__):
+            for method in ['forward', 'backward']:
+                if method not in layer.__dict__:
+                    layer.__dict__[method] = self.traced(path, method, layer, getattr(layer, method))
+        return model
+
+    #before saving the model
+    def uninstrument(self, model):
+        for path, layer in model.walk():
+            for method in ['forward', 'backward']:
+                layer.__dict__.pop(method, None)
+        return model
+
+    def merged_events(self):
+        events = list(self.events)
+        for part in sorted(glob.glob(self.filename+'.*.part')):
+            f = open(part)
+            events += [json.loads(line) for line in f if line.strip()]
+            f.close()
+        return sorted(events, key=lambda event: event['ts'])
+
+    def save(self, filename = None):
+        events = self.merged_events()
+        f = open(filename or self.filename, 'w')
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        f.close()
+        for part in glob.glob(self.filename+'.*.part'):
+            os.remove(part)
+        return events
+
+#merge of traces saved by different runs or machines
+def merge(filenames, output):
+    events = []
+    for filename in filenames:
+        f = open(filename)
+        events += json.load(f)['traceEvents']
+        f.close()
+    f = open(output, 'w')
+    json.dump({'traceEvents': sorted(events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}, f)
+    f.close()
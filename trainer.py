@@ -1,9 +1,21 @@
 import numpy as np
+from timeit import default_timer as timer
+from tracer import span
 
 class Trainer():
-    def __init__(self, show_training = False, show_function = None):
+    #telemetry: a telemetry.Telemetry that records every minibatch (every window in learn_throughtime), None to disable it
+    #tracer: a tracer.Tracer for the timeline of the training phases, None to disable it
+    #memory: a memory.MemoryInspector of the model sampled after every forward, backward and update, None to disable it
+    def __init__(self, show_training = False, show_function = None, telemetry = None, tracer = None, memory = None):
         self.show_training = show_training
         self.show_function = show_function
+        self.telemetry = telemetry
+        self.tracer = tracer
+        self.memory = memory
+
+    def sample_memory(self, phase, optimizer):
+        if self.memory is not None:
+            self.memory.sample(phase, optimizer)
 
     def learn_one(self, model, x, t, loss, optimizer):
         y = model.forward(x, True)
@@ -14,23 +26,39 @@ class Trainer():
         return J, dJdy
 
     def learn_window(self, model, batch, loss, optimizer):
+        with span(self.tracer, 'window'):
+            return self.learn_window_steps(model, batch, loss, optimizer)
+
+    def learn_window_steps(self, model, batch, loss, optimizer):
+        start = timer()
         this_batch_size = len(batch)
         J_train_list = 0
         dJdy_list = 0
         y_list = []
         for i,(x,t) in enumerate(batch):
-            y = model.forward(x, True)
-            y_list.append(y)
-            J = loss.loss(y,t)
+            with span(self.tracer, 'forward'):
+                y = model.forward(x, True)
+                y_list.append(y)
+                J = loss.loss(y,t)
+            self.sample_memory('forward', optimizer)
             J_train_list += np.linalg.norm(J)/this_batch_size
+        t0 = timer()
 
         for i,(x,t) in enumerate(reversed(batch)):
-            dJdy = loss.dJdy_gradient(y_list[this_batch_size-1-i],t)
+            with span(self.tracer, 'backward'):
+                dJdy = loss.dJdy_gradient(y_list[this_batch_size-1-i],t)
 
-            model.backward(dJdy, optimizer)
+                model.backward(dJdy, optimizer)
+            self.sample_memory('backward', optimizer)
             dJdy_list += np.linalg.norm(dJdy)/this_batch_size
+        t1 = timer()
 
-        optimizer.update_model()
+        with span(self.tracer, 'update_model'):
+            optimizer.update_model()
+        end = timer()
+        self.sample_memory('update_model', optimizer)
+        if self.telemetry is not None:
+            self.telemetry.record(this_batch_size, J_train_list, dJdy_list, start, t0-start, t1-t0, end-t1, end)
 
         return J_train_list, dJdy_list
 
@@ -44,6 +72,8 @@ class Trainer():
         model.on_message('init_nodes', window_size)
 
         for epoch in range(epochs):
+            if self.telemetry is not None:
+                self.telemetry.start_epoch(epoch)
             for batch in train_vect:
                 if len(batch) == window_size:
                     J, dJdy = self.learn_window(model, batch, loss, optimizer)
@@ -61,25 +91,81 @@ class Trainer():
         return J_train_list, dJdy_list
 
     def learn_minibatch(self, model, batch, loss, optimizer):
+        with span(self.tracer, 'minibatch'):
+            return self.learn_minibatch_samples(model, batch, loss, optimizer)
+
+    def learn_minibatch_samples(self, model, batch, loss, optimizer):
+        start = timer()
         this_batch_size = len(batch)
         # print this_batch_size
         J_train_list = 0
         dJdy_list = 0
+        forward_time = 0.0
+        backward_time = 0.0
         for i,(x,t) in enumerate(batch):
-
-            y = model.forward(x, True)
-            J = loss.loss(y,t)/this_batch_size
-            dJdy = loss.dJdy_gradient(y,t)/this_batch_size
-
-            model.backward(dJdy, optimizer)
+            t0 = timer()
+            with span(self.tracer, 'forward'):
+                y = model.forward(x, True)
+                J = loss.loss(y,t)/this_batch_size
+                dJdy = loss.dJdy_gradient(y,t)/this_batch_size
+            t1 = timer()
+            forward_time += t1-t0
+            self.sample_memory('forward', optimizer)
+
+            t1 = timer()
+            with span(self.tracer, 'backward'):
+                model.backward(dJdy, optimizer)
+            t2 = timer()
+            backward_time += t2-t1
+            self.sample_memory('backward', optimizer)
 
             J_train_list += np.linalg.norm(J)
             dJdy_list += np.linalg.norm(dJdy)
 
-        optimizer.update_model()
+        t0 = timer()
+        with span(self.tracer, 'update_model'):
+            optimizer.update_model()
+        end = timer()
+        self.sample_memory('update_model', optimizer)
+        if self.telemetry is not None:
+            self.telemetry.record(this_batch_size, J_train_list, dJdy_list, start, forward_time, backward_time, end-t0, end)
 
         return J_train_list, dJdy_list
 
+    #minibatch given as a matrix of inputs X and a matrix of targets T, a sample for each row:
+    #if the model accepts batches there is one forward and one backward of the whole matrices,
+    #otherwise the rows are learned one at a time as in learn_minibatch
+    def learn_minibatch_arrays(self, model, X, T, loss, optimizer):
+        if not model.accepts_batch():
+            return self.learn_minibatch(model, zip(X, T), loss, optimizer)
+        with span(self.tracer, 'minibatch'):
+            start = timer()
+            this_batch_size = len(X)
+            with span(self.tracer, 'forward'):
+                y = model.forward(X, True)
+                J = loss.loss(y,T)/this_batch_size
+                dJdy = loss.dJdy_gradient(y,T)/this_batch_size
+            t1 = timer()
+            self.sample_memory('forward', optimizer)
+
+            with span(self.tracer, 'backward'):
+                model.backward(dJdy, optimizer)
+            t2 = timer()
+            self.sample_memory('backward', optimizer)
+
+            with span(self.tracer, 'update_model'):
+                optimizer.update_model()
+            end = timer()
+            self.sample_memory('update_model', optimizer)
+
+            #the same sums of the norms of the rows of learn_minibatch
+            J_train_list = np.sum(np.sqrt(np.sum(np.reshape(J, (this_batch_size, -1))**2, 1)))
+            dJdy_list = np.sum(np.sqrt(np.sum(np.reshape(dJdy, (this_batch_size, -1))**2, 1)))
+            if self.telemetry is not None:
+                self.telemetry.record(this_batch_size, J_train_list, dJdy_list, start, t1-start, t2-t1, end-t2, end)
+
+            return J_train_list, dJdy_list
+
     def learn(self, model, train, loss, optimizer, epochs, batch_size = 1, test = None):
         J_train_list = np.zeros(epochs)
         J_test_list = np.zeros(epochs)
@@ -90,8 +176,11 @@ class Trainer():
         batches_num = train_num/batch_size
         # print batches_num
         for epoch in range(epochs):
-            np.random.shuffle(train)
-            train_vect = np.array_split(train, batches_num)
+            if self.telemetry is not None:
+                self.telemetry.start_epoch(epoch)
+            with span(self.tracer, 'shuffle/split'):
+                np.random.shuffle(train)
+                train_vect = np.array_split(train, batches_num)
             # print train_vect
             for batch in train_vect:
                 J, dJdy = self.learn_minibatch(model, batch, loss, optimizer)
@@ -42,6 +42,17 @@ def define_weights(weights, input_size = None, output_size = None):
             return weights_val.copy()
 
 class SharedWeights():
+    #incremented every time W is updated, to know when the values computed with W are old
+    #(class attribute also for the weights saved before it was added): by the optimizers, by the copies
+    #of whole models (target network, snapshots) and when W is rebound. The writes in place in W outside
+    #of them (W[...] = values) must increment it too.
+    version = 0
+
+    def __setattr__(self, name, value):
+        if name == 'W':
+            self.__dict__['version'] = self.version+1
+        self.__dict__[name] = value
+
     def __init__(self, weights = 'gaussian', input_size = None, output_size = None, L1 = 0.0, L2 = 0.0):
         self.L1 = L1
         self.L2 = L2